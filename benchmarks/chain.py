@@ -0,0 +1,90 @@
+"""
+mirai2 消息链构造微基准测试
+
+分别以 1, 10, 100 个消息段 (``Plain``, ``At``, ``Image`` 交替) 的消息链, 比较三种构造方式:
+
+* ``validated``: 逐段调用带 ``validate_arguments`` 校验的 ``MessageSegment(**segment)``, 即原先的构造方式
+* ``from_dict``: ``MessageChain(segments)``, 经过类型表查找, 复制每段的数据
+* ``from_raw``: ``MessageChain.from_raw(segments)``, 免校验的事件构造使用, 直接使用解码后的 dict
+
+    python -m benchmarks.chain --sizes 1 10 100 --number 2000
+
+``from_raw`` 会修改传入的数据, 因此每次构造都使用预先解码的一份新数据, 解码不计入耗时
+"""
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List, Callable, Optional
+
+from .fake_mah import group_message
+
+
+def raw_chain(size: int) -> List[Dict[str, Any]]:
+    return group_message(1, segments=size)['messageChain'][1:]
+
+
+def measure(build: Callable[[List[Dict[str, Any]]], Any], frame: str,
+            number: int, repeat: int) -> float:
+    """返回最快一轮中单次构造的耗时, 单位为秒"""
+    best = float('inf')
+    for _ in range(repeat):
+        inputs = [json.loads(frame) for _ in range(number)]
+        start = time.perf_counter()
+        for segments in inputs:
+            build(segments)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def bench(sizes: List[int], number: int, repeat: int) -> List[Dict[str, Any]]:
+    from nonebot.adapters.mirai2 import MessageChain, MessageSegment
+
+    def validated(segments: List[Dict[str, Any]]) -> Any:
+        return MessageChain([MessageSegment(**segment) for segment in segments])
+
+    methods = {
+        'validated': validated,
+        'from_dict': MessageChain,
+        'from_raw': MessageChain.from_raw,
+    }
+    results = []
+    for size in sizes:
+        frame = json.dumps(raw_chain(size))
+        expected = validated(json.loads(frame))
+        result: Dict[str, Any] = {'segments': size}
+        for name, build in methods.items():
+            if build(json.loads(frame)) != expected:
+                raise ValueError(f'{name} builds a different chain')
+            result[f'{name}_us'] = round(measure(build, frame, number, repeat) * 1e6, 3)
+        result['from_raw_speedup'] = round(result['validated_us'] / result['from_raw_us'], 1)
+        results.append(result)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='mirai2 message chain construction benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100],
+                        help='segments per chain')
+    parser.add_argument('--number', type=int, default=2000, help='chains built per round')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds, the fastest one is reported')
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    args = parser.parse_args(argv)
+
+    try:
+        results = bench(args.sizes, args.number, args.repeat)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(results))
+    else:
+        keys = list(results[0])
+        print('  '.join(f'{key:>16}' for key in keys))
+        for result in results:
+            print('  '.join(f'{result[key]:>16}' for key in keys))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
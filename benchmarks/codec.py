@@ -0,0 +1,93 @@
+"""
+mirai2 JSON 编解码器微基准测试
+
+对每个已安装的编解码器 (``mirai_json_codec``) 分别测量解码推送的事件帧与编码发送消息命令的耗时,
+事件帧与 ``benchmarks.run`` 中替身推送的相同, 命令包含嵌套消息链的转发消息段, 与适配器实际发送的一致
+
+    python -m benchmarks.codec --segments 3 --number 20000
+    python -m benchmarks.codec --codec orjson --codec json --json
+
+编码前会检查各编解码器的输出与标准库 ``json`` 一致, 不一致时以状态码 1 退出
+"""
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Optional
+
+from .timing import best_of
+from .fake_mah import group_message
+
+
+def build_command(segments: int) -> Dict[str, Any]:
+    from nonebot.adapters.mirai2 import MessageChain, MessageSegment
+    from nonebot.adapters.mirai2.codec import export
+
+    chain = MessageChain([MessageSegment.plain('hello world')] * segments)
+    forward = MessageSegment.forward([], 20000, 0, 'member', chain, 1)
+    return {
+        'syncId': '1',
+        'command': 'sendGroupMessage',
+        'subCommand': None,
+        'content': {'target': 10000, 'messageChain': export(chain + forward)},
+    }
+
+
+def bench(names: List[str], segments: int, number: int, repeat: int) -> List[Dict[str, Any]]:
+    from nonebot.adapters.mirai2.codec import get_codec
+
+    frame = json.dumps({'syncId': '-1', 'data': group_message(1, segments=segments)})
+    frame_bytes = frame.encode()
+    command = build_command(segments)
+    expected = json.loads(get_codec('json').dumps(command))
+
+    results = []
+    for name in names:
+        codec = get_codec(name)
+        if json.loads(codec.dumps(command)) != expected:
+            raise ValueError(f'{name} encodes the command differently from json')
+        loads = best_of(lambda: codec.loads(frame_bytes), number, repeat)
+        dumps = best_of(lambda: codec.dumps(command), number, repeat)
+        results.append({
+            'codec': name,
+            'loads_us': round(loads * 1e6, 3),
+            'dumps_us': round(dumps * 1e6, 3),
+            'loads_per_sec': round(1 / loads, 1),
+            'dumps_per_sec': round(1 / dumps, 1),
+        })
+    return results
+
+
+def report(results: List[Dict[str, Any]]) -> None:
+    keys = [key for key in results[0] if key != 'codec']
+    print(f"{'':<8}  " + '  '.join(f'{key:>14}' for key in keys))
+    for result in results:
+        print(f"{result['codec']:<8}  " + '  '.join(f'{result[key]:>14}' for key in keys))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='mirai2 json codec benchmark')
+    parser.add_argument('--codec', action='append', default=[],
+                        help='codec to measure, all installed codecs by default')
+    parser.add_argument('--segments', type=int, default=3, help='segments per message')
+    parser.add_argument('--number', type=int, default=20000, help='calls per round')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds, the fastest one is reported')
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    args = parser.parse_args(argv)
+
+    from nonebot.adapters.mirai2.codec import _modules
+
+    names = args.codec or [name for name, module in _modules.items() if module is not None]
+    try:
+        results = bench(names, args.segments, args.number, args.repeat)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(results))
+    else:
+        report(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+mirai2 事件类查找微基准测试
+
+比较根据事件 ``type`` 选择事件类的两种方式:
+
+* ``scan``: 每个事件递归遍历 ``Event`` 的全部子类并按类名比较, 即原先 ``Event.new`` 的处理方式
+* ``registry``: ``Event.get_event_class``, 在子类定义时登记的类型表中查找
+
+``scan_share_of_new`` 为原先的查找在一次完整的群消息 ``Event.new`` 中所占的比例
+
+    python -m benchmarks.event_types --number 20000
+"""
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Type, Optional
+
+from .timing import best_of
+from .fake_mah import group_message
+
+EVENT_TYPES = ('GroupMessage', 'FriendMessage', 'MemberJoinEvent', 'NudgeEvent', 'UnknownEvent')
+
+
+def scan(cls: Type[Any], type: str) -> Optional[Type[Any]]:
+    def all_subclasses(cls: Type[Any]):
+        return set(cls.__subclasses__()).union(
+            [s for c in cls.__subclasses__() for s in all_subclasses(c)])
+
+    event_class = None
+    for subclass in all_subclasses(cls):
+        if subclass.__name__ != type:
+            continue
+        event_class = subclass
+    return event_class
+
+
+def bench(number: int, repeat: int) -> List[Dict[str, Any]]:
+    from nonebot.adapters.mirai2.event import Event
+
+    data = group_message(1)
+    data['self_id'] = 1
+    new = best_of(lambda: Event.new(dict(data)), number, repeat)
+
+    results = []
+    for type in EVENT_TYPES:
+        if scan(Event, type) is not Event.get_event_class(type):
+            raise ValueError(f'lookups disagree on {type}')
+        scanned = best_of(lambda: scan(Event, type), number, repeat)
+        registry = best_of(lambda: Event.get_event_class(type), number, repeat)
+        results.append({
+            'type': type,
+            'scan_us': round(scanned * 1e6, 3),
+            'registry_us': round(registry * 1e6, 3),
+            'speedup': round(scanned / registry, 1),
+            'scan_share_of_new': round(scanned / (new - registry + scanned), 3),
+        })
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='mirai2 event class lookup benchmark')
+    parser.add_argument('--number', type=int, default=20000, help='lookups per round')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds, the fastest one is reported')
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    args = parser.parse_args(argv)
+
+    try:
+        results = bench(args.number, args.repeat)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(results))
+    else:
+        keys = list(results[0])
+        print('  '.join(f'{key:>18}' for key in keys))
+        for result in results:
+            print('  '.join(f'{result[key]:>18}' for key in keys))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import json
+import time
+import asyncio
+import itertools
+from collections import Counter
+from typing import Any, Dict, List, Callable, Iterable, Optional
+
+import websockets
+
+try:
+    import orjson
+
+    def dumps(data: Any) -> str:
+        return orjson.dumps(data).decode()
+except ImportError:
+    dumps = json.dumps
+
+
+def group_message(message_id: int, group: int = 10000, sender: int = 20000,
+                  segments: int = 1, text: str = 'hello world') -> Dict[str, Any]:
+    """
+    :说明:
+
+      构造一条 mirai-api-http 推送的群消息
+
+    :参数:
+
+      * ``message_id: int``: ``Source`` 中的消息 id, 用于计算事件延迟
+      * ``segments: int``: ``Source`` 以外的消息段数量, 依次为 ``Plain``, ``At``, ``Image``
+    """
+    chain: List[Dict[str, Any]] = [{'type': 'Source', 'id': message_id, 'time': int(time.time())}]
+    for i in range(segments):
+        kind = i % 3
+        if kind == 0:
+            chain.append({'type': 'Plain', 'text': text})
+        elif kind == 1:
+            chain.append({'type': 'At', 'target': sender + 1, 'display': '@someone'})
+        else:
+            chain.append({
+                'type': 'Image', 'imageId': '{01E9451B-70ED-EAE3-B37C-101F1EEBF5B5}.jpg',
+                'url': 'https://example.com/image.jpg', 'path': None, 'base64': None,
+                'width': 100, 'height': 100, 'size': 1024, 'imageType': 'JPG', 'isEmoji': False
+            })
+    return {
+        'type': 'GroupMessage',
+        'messageChain': chain,
+        'sender': {
+            'id': sender, 'memberName': 'member', 'specialTitle': '', 'permission': 'MEMBER',
+            'joinTimestamp': 0, 'lastSpeakTimestamp': 0, 'muteTimeRemaining': 0,
+            'group': {'id': group, 'name': 'group', 'permission': 'MEMBER'}
+        }
+    }
+
+
+class FakeMiraiApiHttp:
+    """
+    :说明:
+
+      本地运行的 mirai-api-http websocket 替身, 用于基准测试
+
+      正向模式下作为 websocket 服务端等待适配器连接, 反向模式下作为客户端连接适配器,
+      实现 ``verify``, ``botList`` 握手与按 ``syncId`` 响应命令, 并向适配器推送事件
+
+    :参数:
+
+      * ``verify_key: str``: 与适配器配置相同的 verify_key
+      * ``qqs: Iterable[str]``: 已登录的账号
+      * ``latency: float``: 响应命令前等待的时间, 模拟 mirai 处理命令的耗时
+    """
+
+    def __init__(self, verify_key: str, qqs: Iterable[str], latency: float = 0.0):
+        self.verify_key = verify_key
+        self.qqs = [str(qq) for qq in qqs]
+        self.latency = latency
+        self.connections: Dict[str, Any] = {}
+        self.commands: Counter = Counter()
+        self.pushed: Dict[int, float] = {}
+        self._message_ids = itertools.count(1)
+        self._connected = asyncio.Condition()
+        self._tasks: List["asyncio.Task"] = []
+
+    async def serve(self, host: str, port: int):
+        """正向模式: 启动 websocket 服务端, 返回 ``websockets`` 的 server 对象"""
+        return await websockets.serve(self._handle_forward, host, port, max_size=None)
+
+    async def _handle_forward(self, websocket) -> None:
+        headers = websocket.request.headers
+        qq = headers.get('qq', '')
+        if headers.get('verifyKey') != self.verify_key:
+            await websocket.send(dumps({'syncId': '', 'data': {'code': 1, 'msg': 'Auth Key错误'}}))
+            return
+        if qq not in self.qqs:
+            await websocket.send(dumps({'syncId': '', 'data': {'code': 2, 'msg': '指定的Bot不存在'}}))
+            return
+        await websocket.send(dumps({'syncId': '', 'data': {'code': 0, 'session': f'session-{qq}'}}))
+        await self._register(qq, websocket)
+        await self._session(qq, websocket)
+
+    async def connect(self, url: str, qq: str) -> None:
+        """反向模式: 以 ``qq`` 的身份连接适配器的 ``/mirai2/ws``, 在后台处理命令"""
+        websocket = await websockets.connect(url, additional_headers={'qq': qq}, max_size=None)
+        self._tasks.append(asyncio.create_task(self._session(qq, websocket)))
+
+    async def _session(self, qq: str, websocket) -> None:
+        try:
+            async for frame in websocket:
+                data = json.loads(frame)
+                command = data.get('command')
+                self.commands[command] += 1
+                if command == 'botList':
+                    reply = {'code': 0, 'msg': '', 'data': [int(qq) for qq in self.qqs]}
+                elif command == 'verify':
+                    reply = {'code': 0, 'session': f'session-{qq}'}
+                else:
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    reply = self.respond(command, data.get('subcommand'), data.get('content') or {})
+                await websocket.send(dumps({'syncId': data.get('syncId'), 'data': reply}))
+                if command == 'verify':
+                    await self._register(qq, websocket)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            if self.connections.get(qq) is websocket:
+                del self.connections[qq]
+
+    async def _register(self, qq: str, websocket) -> None:
+        async with self._connected:
+            self.connections[qq] = websocket
+            self._connected.notify_all()
+
+    async def wait_connected(self, count: int, timeout: float = 30) -> None:
+        """等待 ``count`` 个账号完成握手"""
+        async with self._connected:
+            await asyncio.wait_for(
+                self._connected.wait_for(lambda: len(self.connections) >= count), timeout)
+
+    def respond(self, command: str, subcommand: Optional[str], content: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        :说明:
+
+          生成命令的响应数据, 发送消息类命令返回递增的 ``messageId``, 其余命令返回空数据
+        """
+        if command in ('sendGroupMessage', 'sendFriendMessage', 'sendTempMessage', 'sendNudge'):
+            return {'code': 0, 'msg': '', 'messageId': next(self._message_ids)}
+        if command == 'about':
+            return {'code': 0, 'msg': '', 'data': {'version': '2.6.2'}}
+        if command in ('groupList', 'friendList', 'memberList'):
+            return {'code': 0, 'msg': '', 'data': []}
+        return {'code': 0, 'msg': ''}
+
+    async def push(self, qq: str, event: Dict[str, Any]) -> None:
+        """向 ``qq`` 的连接推送一个事件, 消息事件按 ``Source`` 的 id 记录推送时间"""
+        websocket = self.connections[qq]
+        chain = event.get('messageChain')
+        if chain and chain[0].get('type') == 'Source':
+            self.pushed[chain[0]['id']] = time.perf_counter()
+        await websocket.send(dumps({'syncId': '-1', 'data': event}))
+
+    async def push_many(self, events: Callable[[int], Dict[str, Any]], total: int,
+                        rate: Optional[float] = None) -> float:
+        """
+        :说明:
+
+          轮流向全部连接推送 ``total`` 个事件, 返回推送耗时
+
+        :参数:
+
+          * ``events: Callable[[int], Dict[str, Any]]``: 根据序号构造事件
+          * ``rate: Optional[float]``: 每秒推送的事件数, 不填写时尽快推送
+        """
+        qqs = list(self.connections)
+        start = time.perf_counter()
+        for i in range(total):
+            if rate:
+                delay = start + i / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif i % 256 == 0:
+                await asyncio.sleep(0)
+            await self.push(qqs[i % len(qqs)], events(i + 1))
+        return time.perf_counter() - start
+
+    async def close(self) -> None:
+        for websocket in list(self.connections.values()):
+            await websocket.close()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,75 @@
+"""
+mirai2 消息链延迟解析 (``mirai_lazy_message``) 微基准测试
+
+对同一条推送的群消息分别以立即解析与延迟解析构造事件, 统计每秒构造的事件数;
+``--access`` 为 ``none`` 时构造后不访问消息链, 相当于没有插件读取消息的事件,
+为 ``plaintext`` 时构造后调用一次 ``get_plaintext()``, 相当于每个事件都被消息响应器读取
+
+    python -m benchmarks.lazy --segments 10 --number 20000
+    python -m benchmarks.lazy --access plaintext --trusted --json
+
+每次构造前都从 JSON 重新解码事件帧, 与适配器收到数据帧时一致, 结果包含解码的耗时
+"""
+import sys
+import json
+import argparse
+from typing import Any, Dict, List, Optional
+
+from .timing import best_of
+from .fake_mah import group_message
+
+
+def bench(segments: int, access: str, trusted: bool, number: int,
+          repeat: int) -> List[Dict[str, Any]]:
+    from nonebot.adapters.mirai2.codec import get_codec
+    from nonebot.adapters.mirai2.event import Event
+
+    codec = get_codec()
+    data = group_message(1, segments=segments)
+    data['self_id'] = 1
+    frame = codec.dumps(data)
+
+    results = []
+    for lazy in (False, True):
+        if access == 'plaintext':
+            def run() -> None:
+                Event.new(codec.loads(frame), trusted=trusted, lazy=lazy).get_plaintext()
+        else:
+            def run() -> None:
+                Event.new(codec.loads(frame), trusted=trusted, lazy=lazy)
+
+        elapsed = best_of(run, number, repeat)
+        results.append({
+            'mode': 'lazy' if lazy else 'eager',
+            'us_per_event': round(elapsed * 1e6, 3),
+            'events_per_sec': round(1 / elapsed, 1),
+        })
+    for result in results:
+        result['speedup'] = round(results[0]['us_per_event'] / result['us_per_event'], 2)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='mirai2 lazy message chain benchmark')
+    parser.add_argument('--segments', type=int, default=3, help='segments per message')
+    parser.add_argument('--access', choices=('none', 'plaintext'), default='none',
+                        help='how the message chain is used after the event is built')
+    parser.add_argument('--trusted', action='store_true', help='use mirai_trusted_decode')
+    parser.add_argument('--number', type=int, default=20000, help='events per round')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds, the fastest one is reported')
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    args = parser.parse_args(argv)
+
+    results = bench(args.segments, args.access, args.trusted, args.number, args.repeat)
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print(f"{'':<6}  {'us_per_event':>14}  {'events_per_sec':>14}  {'speedup':>8}")
+        for result in results:
+            print(f"{result['mode']:<6}  {result['us_per_event']:>14}  "
+                  f"{result['events_per_sec']:>14}  {result['speedup']:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
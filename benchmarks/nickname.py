@@ -0,0 +1,88 @@
+"""
+mirai2 昵称匹配微基准测试
+
+以给定数量的昵称, 对一批 (默认 10000 条) 群消息开头的纯文本做昵称匹配, 比较:
+
+* ``rebuild``: 每条消息重新拼接昵称并按正则匹配, 即原先的处理方式
+* ``regex``: 适配器初始化时构建一次的 ``NicknameMatcher``
+* ``trie``: 适配器初始化时构建一次的 ``TrieNicknameMatcher`` (``mirai_nickname_matcher=trie``)
+
+    python -m benchmarks.nickname --nicknames 1 20 200 --messages 10000
+
+消息中约有 ``--hit-rate`` 比例以某个昵称开头, 其余不匹配任何昵称
+"""
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Any, Dict, List, Callable, Optional
+
+
+def rebuild(nicknames: List[str]) -> Callable[[str], Any]:
+    def match(text: str) -> Any:
+        nick_regex = '|'.join(filter(lambda x: x, nicknames))
+        return re.search(rf"^({nick_regex})([\s,，]*|$)", text, re.IGNORECASE)
+    return match
+
+
+def measure(match: Callable[[str], Any], messages: List[str], repeat: int) -> float:
+    """返回最快一轮处理全部消息的耗时, 单位为秒"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in messages:
+            match(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(counts: List[int], messages: int, hit_rate: float, repeat: int) -> List[Dict[str, Any]]:
+    from nonebot.adapters.mirai2.utils import get_nickname_matcher
+
+    rng = random.Random(0)
+    results = []
+    for count in counts:
+        nicknames = [f'bot{i}' for i in range(count)]
+        texts = [
+            f'{rng.choice(nicknames)} hello world' if rng.random() < hit_rate
+            else f'hello world {i}'
+            for i in range(messages)
+        ]
+        methods = {
+            'rebuild': rebuild(nicknames),
+            'regex': get_nickname_matcher(nicknames, 'regex').match,
+            'trie': get_nickname_matcher(nicknames, 'trie').match,
+        }
+        result: Dict[str, Any] = {'nicknames': count}
+        for name, match in methods.items():
+            result[f'{name}_ms'] = round(measure(match, texts, repeat) * 1000, 3)
+        results.append(result)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='mirai2 nickname matcher benchmark')
+    parser.add_argument('--nicknames', type=int, nargs='+', default=[1, 20, 200],
+                        help='number of nicknames')
+    parser.add_argument('--messages', type=int, default=10000, help='messages per round')
+    parser.add_argument('--hit-rate', type=float, default=0.1,
+                        help='share of messages starting with a nickname')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds, the fastest one is reported')
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    args = parser.parse_args(argv)
+
+    results = bench(args.nicknames, args.messages, args.hit_rate, args.repeat)
+    if args.json:
+        print(json.dumps(results))
+    else:
+        keys = list(results[0])
+        print('  '.join(f'{key:>12}' for key in keys))
+        for result in results:
+            print('  '.join(f'{result[key]:>12}' for key in keys))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
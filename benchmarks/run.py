@@ -0,0 +1,318 @@
+"""
+mirai2 适配器基准测试
+
+在本地启动 mirai-api-http 替身, 分别以正向 (``_ws_client``) 与反向 (``_handle_ws_server``)
+连接驱动适配器, 统计事件吞吐量, 事件延迟, api 调用吞吐量与每个 Bot 的内存占用
+
+事件吞吐量为不限速推送时每秒处理完成的事件数; 事件延迟为从推送到事件响应器开始执行的时间,
+在固定速率 (``--rate``, 默认为测得吞吐量的一半) 下测量, 避免排队时间掩盖处理耗时;
+内存占用为建立连接过程中, 调用栈经过 nonebot 的仍未释放的分配, 不包含替身本身
+
+    python -m benchmarks.run --mode both --bots 4 --events 20000 --output result.json
+    python -m benchmarks.run --baseline result.json --tolerance 0.2
+    python -m benchmarks.run -o mirai_trusted_decode=true -o mirai_lazy_message=true
+
+需要安装 ``nonebot2[fastapi,websockets]``; 每种模式在单独的进程中运行
+
+指定 ``--baseline`` 时, 任一指标比基线差超过 ``--tolerance`` 的比例则以状态码 1 退出
+"""
+import gc
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import tracemalloc
+from typing import Any, Dict, List, Tuple, Optional
+
+from .fake_mah import FakeMiraiApiHttp, group_message
+
+VERIFY_KEY = 'benchmark'
+
+HIGHER_IS_BETTER = ('events_per_sec', 'api_per_sec')
+LOWER_IS_BETTER = (
+    'event_p50_ms', 'event_p99_ms', 'api_p50_ms', 'api_p99_ms', 'memory_per_bot_kb'
+)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss() -> int:
+    """当前进程的常驻内存, 单位为字节"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def parse_option(text: str) -> Tuple[str, Any]:
+    key, _, value = text.partition('=')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+async def bench(args: argparse.Namespace) -> Dict[str, Any]:
+    import uvicorn
+    import nonebot
+    from nonebot import on_message
+
+    qqs = [str(100000 + i) for i in range(args.bots)]
+    mah_port, nonebot_port = free_port(), free_port()
+    options = dict(args.option)
+    if args.mode == 'forward':
+        nonebot.init(
+            driver='~fastapi+~websockets', verify_key=VERIFY_KEY, log_level=args.log_level,
+            mirai_host='127.0.0.1', mirai_port=mah_port, mirai_qq=qqs, **options
+        )
+    else:
+        nonebot.init(
+            driver='~fastapi', verify_key=VERIFY_KEY, log_level=args.log_level,
+            mirai_forward=False, **options
+        )
+
+    from nonebot.adapters.mirai2 import Adapter, MessageChain, GroupMessage
+
+    driver = nonebot.get_driver()
+    driver.register_adapter(Adapter)
+    adapter: Adapter = driver._adapters[Adapter.get_name()]  # type: ignore
+
+    mah = FakeMiraiApiHttp(VERIFY_KEY, qqs, latency=args.api_latency)
+    latencies: List[float] = []
+    expected = 0
+    finished = asyncio.Event()
+
+    matcher = on_message(block=True)
+
+    @matcher.handle()
+    async def _(event: GroupMessage):
+        pushed = mah.pushed.pop(event.source.id, None) if event.source else None
+        if pushed is not None:
+            latencies.append(time.perf_counter() - pushed)
+        if len(latencies) >= expected:
+            finished.set()
+
+    async def run_events(total: int, rate: Optional[float] = None) -> float:
+        nonlocal expected
+        latencies.clear()
+        finished.clear()
+        expected = total
+        start = time.perf_counter()
+        await mah.push_many(
+            lambda i: group_message(
+                i + start_id, group=10000 + i % args.groups,
+                sender=20000 + i % args.senders, segments=args.segments
+            ),
+            total, rate=rate
+        )
+        try:
+            await asyncio.wait_for(finished.wait(), args.timeout)
+        except asyncio.TimeoutError:
+            pass
+        return time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start(64)
+    mah_server = await mah.serve('127.0.0.1', mah_port) if args.mode == 'forward' else None
+    server = uvicorn.Server(uvicorn.Config(
+        driver.server_app, host='127.0.0.1', port=nonebot_port,
+        log_level='warning', lifespan='on'
+    ))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()
+        await asyncio.sleep(0.01)
+
+    if args.mode == 'reverse':
+        for qq in qqs:
+            await mah.connect(f'ws://127.0.0.1:{nonebot_port}/mirai2/ws', qq)
+    await mah.wait_connected(len(qqs))
+    while len(adapter.bots) < len(qqs):
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.1)
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(True, '*/nonebot/*', all_frames=True),
+    ])
+    tracemalloc.stop()
+    adapter_memory = sum(stat.size for stat in snapshot.statistics('filename'))
+
+    start_id = 0
+    await run_events(min(args.warmup, args.events))
+    start_id = args.warmup
+    elapsed = await run_events(args.events)
+    received = len(latencies)
+
+    start_id += args.events
+    rate = args.rate or received / elapsed / 2
+    await run_events(args.latency_events, rate)
+    event_latencies = list(latencies)
+    mah.pushed.clear()
+
+    bots = list(adapter.bots.values())
+    api_latencies: List[float] = []
+    api_errors = 0
+    message = MessageChain('benchmark')
+
+    async def call(index: int) -> None:
+        nonlocal api_errors
+        for i in range(index, args.api_calls, args.concurrency):
+            start = time.perf_counter()
+            try:
+                await bots[i % len(bots)].send_group_message(
+                    target=10000 + i % args.groups, message_chain=message)
+            except Exception:
+                api_errors += 1
+            else:
+                api_latencies.append(time.perf_counter() - start)
+
+    api_start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(args.concurrency)))
+    api_elapsed = time.perf_counter() - api_start
+
+    # 先由替身关闭连接, 否则 uvicorn 需要等待反向 ws 连接超时才能退出
+    await mah.close()
+    if mah_server is not None:
+        mah_server.close()
+        await mah_server.wait_closed()
+    deadline = time.perf_counter() + 5
+    while adapter.bots and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+    server.should_exit = True
+    await server_task
+
+    return {
+        'mode': args.mode,
+        'bots': args.bots,
+        'events': args.events,
+        'received': received,
+        'events_per_sec': round(received / elapsed, 1) if elapsed else 0.0,
+        'event_p50_ms': round(percentile(event_latencies, 0.5) * 1000, 3),
+        'event_p99_ms': round(percentile(event_latencies, 0.99) * 1000, 3),
+        'api_calls': args.api_calls,
+        'api_errors': api_errors,
+        'api_per_sec': round(len(api_latencies) / api_elapsed, 1) if api_elapsed else 0.0,
+        'api_p50_ms': round(percentile(api_latencies, 0.5) * 1000, 3),
+        'api_p99_ms': round(percentile(api_latencies, 0.99) * 1000, 3),
+        'memory_per_bot_kb': round(adapter_memory / args.bots / 1024, 1),
+        'rss_mb': round(rss() / 1024 / 1024, 1),
+    }
+
+
+def run_subprocess(args: argparse.Namespace, mode: str) -> Dict[str, Any]:
+    """每种模式在单独的进程中运行, 互不影响导入缓存与内存统计"""
+    argv = [
+        sys.executable, '-m', 'benchmarks.run', '--mode', mode, '--json',
+        '--bots', str(args.bots), '--events', str(args.events), '--warmup', str(args.warmup),
+        '--latency-events', str(args.latency_events),
+        '--segments', str(args.segments), '--groups', str(args.groups),
+        '--senders', str(args.senders), '--api-calls', str(args.api_calls),
+        '--concurrency', str(args.concurrency), '--api-latency', str(args.api_latency),
+        '--timeout', str(args.timeout), '--log-level', args.log_level,
+    ]
+    if args.rate:
+        argv += ['--rate', str(args.rate)]
+    for key, value in args.option:
+        argv += ['-o', f'{key}={json.dumps(value)}']
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(argv, cwd=cwd, stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """与基线比较, 返回超过容差的退化项"""
+    regressions = []
+    previous = {item['mode']: item for item in baseline}
+    for result in results:
+        base = previous.get(result['mode'])
+        if base is None:
+            continue
+        for key in HIGHER_IS_BETTER:
+            if base.get(key) and result[key] < base[key] * (1 - tolerance):
+                regressions.append(f"{result['mode']} {key}: {base[key]} -> {result[key]}")
+        for key in LOWER_IS_BETTER:
+            if base.get(key) and result[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{result['mode']} {key}: {base[key]} -> {result[key]}")
+    return regressions
+
+
+def report(results: List[Dict[str, Any]]) -> None:
+    keys = [key for key in results[0] if key != 'mode']
+    width = max(len(key) for key in keys)
+    print(f"{'':<{width}}  " + '  '.join(f"{result['mode']:>12}" for result in results))
+    for key in keys:
+        print(f'{key:<{width}}  ' + '  '.join(f'{result[key]:>12}' for result in results))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='mirai2 adapter benchmark')
+    parser.add_argument('--mode', choices=('forward', 'reverse', 'both'), default='both')
+    parser.add_argument('--bots', type=int, default=4, help='number of bot connections')
+    parser.add_argument('--events', type=int, default=20000, help='events pushed in total')
+    parser.add_argument('--warmup', type=int, default=1000, help='events pushed before measuring')
+    parser.add_argument('--latency-events', type=int, default=2000,
+                        help='events pushed at a fixed rate to measure latency')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='events per second when measuring latency, '
+                             'half of the measured throughput by default')
+    parser.add_argument('--segments', type=int, default=3, help='segments per message')
+    parser.add_argument('--groups', type=int, default=50, help='distinct groups')
+    parser.add_argument('--senders', type=int, default=500, help='distinct senders')
+    parser.add_argument('--api-calls', type=int, default=5000, help='api calls in total')
+    parser.add_argument('--concurrency', type=int, default=64, help='concurrent api callers')
+    parser.add_argument('--api-latency', type=float, default=0.0,
+                        help='simulated mirai-api-http response delay in seconds')
+    parser.add_argument('--timeout', type=float, default=60, help='seconds to wait for events')
+    parser.add_argument('-o', '--option', type=parse_option, action='append', default=[],
+                        metavar='KEY=VALUE', help='adapter config, value parsed as json if possible')
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    parser.add_argument('--output', help='write results to this json file')
+    parser.add_argument('--baseline', help='compare with a previous --output file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative regression against the baseline')
+    args = parser.parse_args(argv)
+
+    if args.mode == 'both':
+        results = [run_subprocess(args, mode) for mode in ('forward', 'reverse')]
+    else:
+        results = [asyncio.run(bench(args))]
+
+    if args.json:
+        print(json.dumps(results[0] if len(results) == 1 else results))
+    else:
+        report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'regression: {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import time
+from typing import Any, Callable
+
+
+def best_of(func: Callable[[], Any], number: int, repeat: int) -> float:
+    """重复 ``repeat`` 轮, 每轮调用 ``number`` 次, 返回最快一轮的单次耗时, 单位为秒"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
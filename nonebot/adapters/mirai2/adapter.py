@@ -1,7 +1,7 @@
-import json
+import time
 import asyncio
 import contextlib
-from typing import Any, Dict, List, Optional, Literal, cast
+from typing import Any, Dict, List, Set, Union, Callable, Optional, Literal
 
 from nonebot.utils import escape_tag
 from nonebot.adapters import Adapter as BaseAdapter
@@ -11,8 +11,10 @@ from nonebot.drivers import (
     Driver,
     Request,
     WebSocket,
+    Response,
     ReverseDriver,
     ForwardDriver,
+    HTTPServerSetup,
     WebSocketServerSetup
 )
 
@@ -20,19 +22,68 @@ from . import log
 from .bot import Bot
 from .config import Config
 from .event import Event
-from .utils import (
-    SyncIDStore,
-    process_event,
-    snake_to_camel,
-    MiraiDataclassEncoder
-)
+from .exception import ApiNotAvailable, NetworkError
+from .codec import export, get_codec
+from .cache import MetadataCache, cache_key
+from .dispatcher import EventDispatcher
+from .throttle import SEND_APIS, SendScheduler
+from .connection import Backoff, ConnectionStats
+from .index import MessageIndex
+from .media import MediaCache
+from .metrics import Metrics
+from .polling import HTTPClient, PollSchedule, PollingConnection
+from .preprocess import process_event
+from .record import TrafficRecorder
+from .shard import ShardLink, RelayFailed, shard_key
+from .upload import UPLOAD_TYPES, FileInput, open_upload, upload_segments
+from .utils import SyncIDStore, snake_to_camel, get_nickname_matcher
+from .webhook import WebhookReply, webhook_reply
 
 class Adapter(BaseAdapter):
 
     def __init__(self, driver: Driver, **kwargs: Any):
         super().__init__(driver, **kwargs)
         self.mirai_config: Config = Config(**self.config.dict())
-        self.connections: Dict[str, WebSocket] = {}
+        self.codec = get_codec(self.mirai_config.mirai_json_codec)
+        self.nickname_matcher = get_nickname_matcher(
+            self.config.nickname, self.mirai_config.mirai_nickname_matcher)
+        self.connections: Dict[str, Union[WebSocket, PollingConnection]] = {}
+        self.sessions: Dict[str, str] = {}
+        self.sync_stores: Dict[str, SyncIDStore] = {}
+        self.dispatchers: Dict[str, EventDispatcher] = {}
+        self.schedulers: Dict[str, SendScheduler] = {}
+        self.heartbeats: Dict[str, "asyncio.Task"] = {}
+        self.caches: Dict[str, MetadataCache] = {}
+        self.warmups: Dict[str, "asyncio.Task"] = {}
+        self.message_indexes: Dict[str, MessageIndex] = {}
+        self.connection_stats: Dict[str, ConnectionStats] = {}
+        self.shards: Dict[str, Dict[int, ShardLink]] = {}
+        self.webhook_bots: Set[str] = set()
+        self._connect_semaphore: Optional[asyncio.Semaphore] = None
+        self.media_cache: Optional[MediaCache] = None
+        if self.mirai_config.mirai_media_cache:
+            self.media_cache = MediaCache(
+                size=self.mirai_config.mirai_media_cache_size,
+                path=self.mirai_config.mirai_media_cache_path
+            )
+            self.driver.on_shutdown(self.media_cache.close)
+        self.metrics: Optional[Metrics] = None
+        if self.mirai_config.mirai_metrics:
+            self.metrics = Metrics()
+            self.metrics.add_collector(self._collect_metrics)
+        self.recorder: Optional[TrafficRecorder] = None
+        if self.mirai_config.mirai_record_path:
+            self.recorder = TrafficRecorder(
+                self.mirai_config.mirai_record_path,
+                compress=self.mirai_config.mirai_record_compress,
+                codec=self.codec
+            )
+            self.driver.on_shutdown(self.recorder.close)
+        if self.mirai_config.mirai_event_workers > 0:
+            self.driver.on_shutdown(self._stop_dispatchers)
+        if self.mirai_config.mirai_send_rate or self.mirai_config.mirai_target_send_rate:
+            self.driver.on_shutdown(self._stop_schedulers)
+        self.http_client: Optional[HTTPClient] = None
         self.tasks: List["asyncio.Task"] = []
         self.setup()
 
@@ -47,6 +98,26 @@ class Adapter(BaseAdapter):
                     URL("/mirai2/ws"), self.get_name(), self._handle_ws_server
                 )
             )
+            if self.mirai_config.mirai_shards > 0:
+                self.setup_websocket_server(
+                    WebSocketServerSetup(
+                        URL("/mirai2/shard"), self.get_name(), self._handle_shard
+                    )
+                )
+            if self.mirai_config.mirai_webhook:
+                self.setup_http_server(
+                    HTTPServerSetup(
+                        URL(self.mirai_config.mirai_webhook_path), "POST",
+                        self.get_name(), self._handle_webhook
+                    )
+                )
+            if self.metrics is not None and self.mirai_config.mirai_metrics_path:
+                self.setup_http_server(
+                    HTTPServerSetup(
+                        URL(self.mirai_config.mirai_metrics_path), "GET",
+                        self.get_name(), self._handle_metrics
+                    )
+                )
 
         if isinstance(self.driver, ForwardDriver) and self.mirai_config.mirai_forward:
             if not all([
@@ -56,8 +127,12 @@ class Adapter(BaseAdapter):
                 isinstance(self.mirai_config.mirai_qq, list),
             ]):
                 raise ValueError("请检查环境变量中的 Verify_key, Mirai_host, Mirai_port, Mirai_qq 是否异常")
-            self.driver.on_startup(self._start_ws_client)
-            self.driver.on_shutdown(self._stop_ws_client)
+            if self.mirai_config.mirai_http_polling:
+                self.driver.on_startup(self._start_http_polling)
+                self.driver.on_shutdown(self._stop_http_polling)
+            else:
+                self.driver.on_startup(self._start_ws_client)
+                self.driver.on_shutdown(self._stop_ws_client)
 
     async def _handle_ws_server(self, websocket: WebSocket):
         access_token = self.mirai_config.mirai_access_token
@@ -68,58 +143,225 @@ class Adapter(BaseAdapter):
 
         await websocket.accept()
 
-        await websocket.send(json.dumps({"syncId": "-1", "command": "botList", "content": {}}))
-        bot_list = json.loads(await websocket.receive()).get("data", {}).get("data", [])
+        await websocket.send(self.codec.dumps({"syncId": "-1", "command": "botList", "content": {}}))
+        bot_list = self.codec.loads(await websocket.receive()).get("data", {}).get("data", [])
 
         qqid = websocket.request.headers.get("qq")
         if int(qqid) not in bot_list:
             await websocket.close(code=1000, reason=f"账号 {qqid} 未在客户端登录")
             return
         
-        await websocket.send(json.dumps({
+        await websocket.send(self.codec.dumps({
             "syncId": "-1", "command": "verify", "content": {
                 "verifyKey": self.mirai_config.verify_key,
                 "sessionKey": None,
                 "qq": qqid
             }
         }))
-        code = json.loads(await websocket.receive()).get("data", {})
+        code = self.codec.loads(await websocket.receive()).get("data", {})
         if code.get("code"):
             log.error(f"{qqid}, {code}")
             return
         
         bot = Bot(self, qqid)
+        self._release_webhook_bot(qqid)
         self.bot_connect(bot)
-        self.connections[qqid] = websocket
+        self._connection_open(bot, websocket)
+        if code.get("session"):
+            self._set_session(qqid, code["session"])
+        self._connection_ready(bot)
         log.info(f"({bot.self_id}) connection ...")
 
         try:
             while True:
-                data = await websocket.receive()
-                json_data = json.loads(data)
+                json_data = self._decode(qqid, await websocket.receive())
                 if json_data.get("data"):
                     self._event_handle(bot, json_data)
         except WebSocketClosed as e:
-            qqid = ", ".join(self.connections)
             log.warning(f"WebSocket for Bot {escape_tag(qqid)} closed by peer")
+            self._connection_close(qqid, e)
         except Exception as e:
             log.error(f"<r><bg #f8bbd0>Error while process data from websocket "
                 f"for bot {escape_tag(bot.self_id)}.</bg #f8bbd0></r>", e)
+            self._connection_close(qqid, e)
         finally:
             with contextlib.suppress(Exception):
                 await websocket.close()
-            self.connections.pop(qqid, None)
+            self._connection_close(qqid)
             self.bot_disconnect(bot=bot)
 
+    def _release_webhook_bot(self, qq: str) -> None:
+        """由 webhook 推送创建的 Bot 在建立 websocket 或 http 轮询连接时断开, 交由新连接的 Bot 接管"""
+        if qq in self.webhook_bots:
+            self.webhook_bots.discard(qq)
+            bot = self.bots.get(qq)
+            if bot is not None:
+                self.bot_disconnect(bot)
+
+    async def _handle_webhook(self, request: Request) -> Response:
+        access_token = self.mirai_config.mirai_access_token
+        if access_token is not None and access_token != request.headers.get("access_token", ""):
+            return Response(403, content="access_token error")
+        qq = request.headers.get("qq")
+        if not qq or not request.content:
+            return Response(400, content="missing qq header or body")
+        try:
+            data = self._decode(qq, request.content)
+        except Exception as e:
+            log.warning(f"Invalid webhook body for Bot {escape_tag(qq)}", e)
+            return Response(400, content="invalid json")
+
+        bot = self.bots.get(qq)
+        if bot is None:
+            bot = Bot(self, qq)
+            self.bot_connect(bot)
+            self.webhook_bots.add(qq)
+            log.info(f"<y>Bot {escape_tag(qq)}</y> connected by webhook")
+
+        reply = WebhookReply(qq)
+        token = webhook_reply.set(reply)
+        try:
+            tasks = [
+                self._event_handle(bot, {"syncId": "-1", "data": item}, dispatch=False)
+                for item in (data if isinstance(data, list) else [data])
+            ]
+        finally:
+            webhook_reply.reset(token)
+        command = await reply.wait(
+            [task for task in tasks if task is not None],
+            self.mirai_config.mirai_webhook_reply_timeout
+        )
+        if command is None:
+            return Response(200)
+        return Response(
+            200,
+            headers={"Content-Type": "application/json"},
+            content=self.codec.dumps(command)
+        )
+
+    async def _handle_shard(self, websocket: WebSocket):
+        headers = websocket.request.headers
+        qq = headers.get("qq", "")
+        try:
+            index = int(headers.get("shard", ""))
+        except ValueError:
+            index = -1
+        if headers.get("verifyKey") != self.mirai_config.verify_key:
+            await websocket.close(code=1008, reason="verifyKey error")
+            return
+        if not 0 <= index < self.mirai_config.mirai_shards:
+            await websocket.close(code=1008, reason=f"shard {index} out of range")
+            return
+
+        await websocket.accept()
+        links = self.shards.setdefault(qq, {})
+        previous = links.get(index)
+        if previous is not None:
+            previous.close()
+            with contextlib.suppress(Exception):
+                await previous.websocket.close()
+        link = links[index] = ShardLink(websocket)
+        await websocket.send(self.codec.dumps({
+            "syncId": "", "data": {"code": 0, "session": self.sessions.get(qq)}
+        }))
+        log.info(f"Shard {index} of Bot {escape_tag(qq)} connected")
+
+        try:
+            while True:
+                frame = self.codec.loads(await websocket.receive())
+                if frame.get("command"):
+                    asyncio.create_task(self._relay(qq, link, frame))
+        except WebSocketClosed:
+            log.warning(f"Shard {index} of Bot {escape_tag(qq)} disconnected")
+        except Exception as e:
+            log.error(f"<r><bg #f8bbd0>Error while process data from shard {index} "
+                f"of bot {escape_tag(qq)}.</bg #f8bbd0></r>", e)
+        finally:
+            if links.get(index) is link:
+                del links[index]
+            link.close()
+            with contextlib.suppress(Exception):
+                await websocket.close()
+
+    def _set_session(self, qq: str, session: str) -> None:
+        """保存 Bot 的会话, 并同步给已连接的分片进程, 供其上传文件时使用"""
+        self.sessions[qq] = session
+        links = self.shards.get(qq)
+        if links:
+            frame = self.codec.dumps({"syncId": "", "data": {"code": 0, "session": session}})
+            for link in links.values():
+                link.send(frame)
+
+    async def _relay(self, qq: str, link: ShardLink, frame: Dict[str, Any]) -> None:
+        """
+        代分片进程调用 api, 并将 mirai-api-http 的响应原样返回
+
+        可缓存的 api 经过主进程的缓存, 分片进程自身不缓存, 由收到全部事件的主进程保持缓存一致
+        """
+        api, subcommand = frame["command"], frame.get("subcommand")
+        data = frame.get("content") or {}
+        bot = self.bots.get(qq)
+        try:
+            if bot is None:
+                raise ApiNotAvailable(f'Bot {qq} is not connected')
+
+            async def send(api: str, data: Dict[str, Any]) -> Any:
+                return (await self._send_command(bot, api, subcommand, data)).get("data")
+
+            async def load() -> Any:
+                response = await send(api, data)
+                if response.get("code") not in (None, 0):
+                    raise RelayFailed(response)
+                return response
+
+            scheduler = self.schedulers.get(qq)
+            cache = self.caches.get(qq)
+            key = cache_key(api, subcommand, data) if cache is not None else None
+            if scheduler is not None and api in SEND_APIS:
+                response = await scheduler.submit(api, data, send)
+            elif key is not None:
+                response = await cache.fetch(key, load)  # type: ignore
+            else:
+                response = await send(api, data)
+                if cache is not None:
+                    cache.handle_api(api, subcommand, data)
+        except RelayFailed as e:
+            response = e.response
+        except Exception as e:
+            response = {"code": 500, "msg": repr(e)}
+        link.send(self.codec.dumps({"syncId": frame.get("syncId"), "data": response}))
+
     async def _start_ws_client(self):
+        if self.mirai_config.mirai_connect_concurrency > 0:
+            self._connect_semaphore = asyncio.Semaphore(
+                self.mirai_config.mirai_connect_concurrency)
+        ws_url = (f"ws://{self.mirai_config.mirai_host}:{self.mirai_config.mirai_port}"
+                  f"{self.mirai_config.mirai_ws_path}")
+        try:
+            url = URL(ws_url)
+        except Exception as e:
+            log.error(f"<r><bg #f8bbd0>Bad url {escape_tag(ws_url)} "
+                "in mirai2 forward websocket config</bg #f8bbd0></r>",
+                e)
+            return
         for qq in self.mirai_config.mirai_qq:
-            try:
-                ws_url = URL(f"ws://{self.mirai_config.mirai_host}:{self.mirai_config.mirai_port}/all")
-                self.tasks.append(asyncio.create_task(self._ws_client(qq, ws_url)))
-            except Exception as e:
-                log.error(f"<r><bg #f8bbd0>Bad url {escape_tag(str(ws_url))} "
-                    "in mirai2 forward websocket config</bg #f8bbd0></r>",
-                    e)
+            self.tasks.append(asyncio.create_task(self._ws_client(qq, url)))
+
+    async def _connect_slot(self) -> Callable[[], None]:
+        """等待一个握手名额, 返回释放该名额的函数, 重复调用时只释放一次"""
+        semaphore = self._connect_semaphore
+        if semaphore is None:
+            return lambda: None
+        await semaphore.acquire()
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                semaphore.release()
+
+        return release
 
     async def _stop_ws_client(self):
         for task in self.tasks:
@@ -131,88 +373,456 @@ class Adapter(BaseAdapter):
             "verifyKey": self.mirai_config.verify_key,
             "qq": qq
         }
+        if self.mirai_config.mirai_shard is not None:
+            headers["shard"] = str(self.mirai_config.mirai_shard)
         request = Request(
             "GET",
             url=url,
             headers=headers,
-            timeout=3
+            timeout=self.mirai_config.mirai_connect_timeout
         )
+        backoff = Backoff(
+            self.mirai_config.mirai_reconnect_interval,
+            self.mirai_config.mirai_reconnect_max_interval,
+            self.mirai_config.mirai_reconnect_jitter
+        )
+        stats = self.connection_stats.setdefault(qq, ConnectionStats())
 
         while True:
+            stats.connecting()
+            release = await self._connect_slot()
             try:
                 async with self.websocket(request) as ws:
                     log.debug(f"WebSocket Connection to {escape_tag(str(url))} established")
                     try:
                         bot = Bot(self, qq)
-                        self.connections[qq] = ws
+                        self._connection_open(bot, ws)
+                        self._release_webhook_bot(qq)
                         self.bot_connect(bot)
                         log.info(f"<y>Bot {escape_tag(qq)}</y> connected")
 
-                        data = json.loads(await ws.receive()).get("data", {})
-                        if data.get("code") > 0:
-                            log.warning(f'{json_data["data"]["msg"]}: {qq}')
+                        data = self.codec.loads(await asyncio.wait_for(
+                            ws.receive(), self.mirai_config.mirai_connect_timeout
+                        )).get("data", {})
+                        release()
+                        if data.get("code"):
+                            log.warning(f'{data.get("msg")}: {qq}')
+                            self._connection_close(qq, NetworkError(f'verify failed: {data}'))
                             return
+                        backoff.reset()
+                        if data.get("session"):
+                            self._set_session(qq, data["session"])
+                        self._connection_ready(bot)
 
                         while True:
-                            data = await ws.receive()
-                            json_data = json.loads(data)
+                            json_data = self._decode(qq, await ws.receive())
                             self._event_handle(bot, json_data)
                     except WebSocketClosed as e:
                         log.error("<r><bg #f8bbd0>WebSocket Closed</bg #f8bbd0></r>", e)
+                        self._connection_close(qq, e)
                     except Exception as e:
                         log.error("<r><bg #f8bbd0>Error while process data from websocket"
                             f"{escape_tag(str(url))}. Trying to reconnect...</bg #f8bbd0></r>",
                             e
                         )
+                        self._connection_close(qq, e)
                     finally:
-                        self.connections.pop(qq, None)
+                        self._connection_close(qq)
                         self.bot_disconnect(bot)
             except Exception as e:
                 log.error("<r><bg #f8bbd0>Error while setup websocket to "
                     f"{escape_tag(str(url))}. Trying to reconnect...</bg #f8bbd0></r>",
                     e
                 )
-            await asyncio.sleep(3)
+                stats.disconnected(e)
+            finally:
+                release()
+            await asyncio.sleep(backoff.next())
+
+    async def _start_http_polling(self):
+        self.http_client = HTTPClient(self, self.mirai_config.mirai_http_pool_size)
+        for qq in self.mirai_config.mirai_qq:
+            self.tasks.append(asyncio.create_task(self._http_polling(qq)))
 
-    def _event_handle(self, bot: Bot, event: Dict):
+    async def _stop_http_polling(self):
+        for task in self.tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.http_client is not None:
+            await self.http_client.close()
+
+    async def _http_polling(self, qq: str):
+        config = self.mirai_config
+        backoff = Backoff(
+            config.mirai_reconnect_interval,
+            config.mirai_reconnect_max_interval,
+            config.mirai_reconnect_jitter
+        )
+        stats = self.connection_stats.setdefault(qq, ConnectionStats())
+
+        while True:
+            stats.connecting()
+            connection = PollingConnection(self, qq)
+            try:
+                await connection.open()
+            except Exception as e:
+                log.error("<r><bg #f8bbd0>Error while binding session of "
+                    f"Bot {escape_tag(qq)}. Trying to reconnect...</bg #f8bbd0></r>",
+                    e
+                )
+                stats.disconnected(e)
+                await asyncio.sleep(backoff.next())
+                continue
+
+            backoff.reset()
+            bot = Bot(self, qq)
+            self._connection_open(bot, connection)
+            self._release_webhook_bot(qq)
+            self.bot_connect(bot)
+            self._set_session(qq, connection.session)
+            self._connection_ready(bot)
+            log.info(f"<y>Bot {escape_tag(qq)}</y> connected by http polling")
+            try:
+                await self._poll(bot, connection)
+            except Exception as e:
+                log.error("<r><bg #f8bbd0>Error while polling events "
+                    f"for Bot {escape_tag(qq)}. Trying to reconnect...</bg #f8bbd0></r>",
+                    e
+                )
+                self._connection_close(qq, e)
+            finally:
+                self._connection_close(qq)
+                self.bot_disconnect(bot)
+                await asyncio.shield(connection.release())
+            await asyncio.sleep(backoff.next())
+
+    async def _poll(self, bot: Bot, connection: PollingConnection) -> None:
+        """以自适应的批量与间隔轮询 ``fetchMessage``, 直至连接关闭"""
+        config = self.mirai_config
+        schedule = PollSchedule(
+            config.mirai_poll_interval, config.mirai_poll_min_count, config.mirai_poll_max_count
+        )
+        while not connection.closed:
+            events = await connection.fetch(schedule.count)
+            for data in events:
+                self._event_handle(bot, {"syncId": "-1", "data": data})
+            delay = schedule.update(len(events))
+            if delay:
+                await connection.wait(delay)
+            else:
+                await asyncio.sleep(0)
+
+    def _connection_open(self, bot: Bot, websocket: Union[WebSocket, PollingConnection]) -> None:
+        config = self.mirai_config
+        qq = bot.self_id
+        self.connection_stats.setdefault(qq, ConnectionStats())
+        self.connections[qq] = websocket
+        self.sync_stores[qq] = SyncIDStore(max_pending=config.mirai_api_max_pending)
+        if config.mirai_event_workers > 0 and qq not in self.dispatchers:
+            self.dispatchers[qq] = EventDispatcher(
+                config.mirai_event_workers,
+                queue_size=config.mirai_event_queue_size,
+                overflow=config.mirai_event_overflow
+            )
+        if (config.mirai_send_rate or config.mirai_target_send_rate) and qq not in self.schedulers:
+            self.schedulers[qq] = SendScheduler(
+                rate=config.mirai_send_rate,
+                burst=config.mirai_send_burst,
+                target_rate=config.mirai_target_send_rate,
+                target_burst=config.mirai_target_send_burst,
+                coalesce=config.mirai_send_coalesce
+            )
+        if config.mirai_message_index_size > 0 and qq not in self.message_indexes:
+            self.message_indexes[qq] = MessageIndex(
+                size=config.mirai_message_index_size,
+                target_size=config.mirai_message_index_target_size,
+                max_bytes=config.mirai_message_index_max_bytes
+            )
+        if config.mirai_cache and config.mirai_shard is None:
+            self.caches[qq] = MetadataCache(
+                ttl=config.mirai_cache_ttl,
+                maxsize=config.mirai_cache_size
+            )
+
+    def _connection_ready(self, bot: Bot) -> None:
+        """连接通过验证后调用, 此后才计为已连接并开始心跳"""
+        qq = bot.self_id
+        self.connection_stats[qq].connected()
+        if self.mirai_config.mirai_heartbeat_interval:
+            self.heartbeats[qq] = asyncio.create_task(self._heartbeat(bot, self.connections[qq]))
+        if qq in self.caches and self.mirai_config.mirai_cache_warmup:
+            self.warmups[qq] = asyncio.create_task(self._warmup(bot))
+
+    def _connection_close(self, qq: str, error: Optional[BaseException] = None) -> None:
+        if self.connections.pop(qq, None) is None:
+            return
+        self.sessions.pop(qq, None)
+        self.connection_stats[qq].disconnected(error)
+        for pool in (self.sync_stores, self.caches):
+            item = pool.pop(qq, None)
+            if item is not None:
+                item.close()
+        for tasks in (self.heartbeats, self.warmups):
+            task = tasks.pop(qq, None)
+            if task is not None:
+                task.cancel()
+
+    async def _stop_dispatchers(self) -> None:
+        """关闭时等待各 Bot 的事件队列处理完毕"""
+        dispatchers = list(self.dispatchers.values())
+        self.dispatchers.clear()
+        for dispatcher in dispatchers:
+            dispatcher.close()
+        await asyncio.gather(*(dispatcher.wait_closed() for dispatcher in dispatchers))
+
+    def _stop_schedulers(self) -> None:
+        """关闭时取消各 Bot 排队中的消息"""
+        for scheduler in self.schedulers.values():
+            scheduler.close()
+        self.schedulers.clear()
+
+    async def _heartbeat(self, bot: Bot, websocket: Union[WebSocket, PollingConnection]) -> None:
+        config = self.mirai_config
+        stats = self.connection_stats[bot.self_id]
+        while True:
+            await asyncio.sleep(config.mirai_heartbeat_interval)
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    self._request(bot, "about", None, {}),
+                    timeout=config.mirai_heartbeat_timeout
+                )
+            except Exception as e:
+                log.warning(f"Heartbeat of Bot {escape_tag(bot.self_id)} failed, "
+                    "closing connection", e)
+                with contextlib.suppress(Exception):
+                    await websocket.close()
+                return
+            stats.heartbeat(time.perf_counter() - start)
+
+    async def _warmup(self, bot: Bot) -> None:
+        """预先加载群列表, 好友列表与各群的成员列表至缓存"""
+        try:
+            groups = await bot.call_api("group_list")
+            await bot.call_api("friend_list")
+            await bot.call_many(
+                [("member_list", {"target": group["id"]}) for group in groups.get("data") or []],
+                concurrency=4,
+                return_exceptions=True
+            )
+        except Exception as e:
+            log.warning(f"Failed to warm up cache of Bot {escape_tag(bot.self_id)}", e)
+        else:
+            log.debug(f"Cache of Bot {escape_tag(bot.self_id)} warmed up: "
+                f"{self.caches[bot.self_id].stats()}")
+
+    def _decode(self, qq: str, frame: Any) -> Dict[str, Any]:
+        metrics = self.metrics
+        if metrics is None:
+            return self.codec.loads(frame)
+        start = time.perf_counter()
+        data = self.codec.loads(frame)
+        metrics.observe("decode", time.perf_counter() - start, bot=qq)
+        return data
+
+    async def _handle_metrics(self, request: Request) -> Response:
+        return Response(
+            200,
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+            content=self.metrics.render() if self.metrics is not None else ""
+        )
+
+    def _collect_metrics(self):
+        for qq, stats in self.connection_stats.items():
+            yield "connected", {"bot": qq}, int(stats.state == "connected")
+            yield "heartbeat_latency_seconds", {"bot": qq}, stats.latency
+        for qq, store in self.sync_stores.items():
+            yield "api_in_flight", {"bot": qq}, store.in_flight
+        for qq, dispatcher in self.dispatchers.items():
+            yield "event_queue_size", {"bot": qq}, dispatcher.queued
+            yield "events_dropped", {"bot": qq}, dispatcher.dropped
+        for qq, scheduler in self.schedulers.items():
+            send_stats = scheduler.stats()
+            yield "send_queue_size", {"bot": qq}, send_stats["queued"]
+            yield "send_queue_latency_avg_seconds", {"bot": qq}, send_stats["latency_avg"]
+            yield "send_queue_latency_max_seconds", {"bot": qq}, send_stats["latency_max"]
+        for qq, cache in self.caches.items():
+            yield "metadata_cache_hits", {"bot": qq}, cache.hits
+            yield "metadata_cache_misses", {"bot": qq}, cache.misses
+        if self.media_cache is not None:
+            yield "media_cache_hits", {}, self.media_cache.hits
+            yield "media_cache_misses", {}, self.media_cache.misses
+
+    def _event_handle(self, bot: Bot, event: Dict, dispatch: bool = True) -> Optional["asyncio.Task"]:
+        """
+        :说明:
+
+          处理收到的一帧数据, api 响应交给 ``SyncIDStore``, 事件解析后交给事件处理
+
+        :参数:
+
+          * ``dispatch: bool``: 是否交给 ``mirai_event_workers`` 的 worker 处理,
+            为 ``False`` 时总是单独创建任务, 任务继承当前的上下文
+
+        :返回:
+
+          单独处理该事件的任务, 事件交给 worker 或分片进程时为 ``None``
+        """
         if int(event.get("syncId") or "0") >= 0:
-            SyncIDStore.add_response(event)
+            if event.get("syncId") == "" and self.mirai_config.mirai_shard is not None:
+                session = (event.get("data") or {}).get("session")
+                if session:
+                    self.sessions[bot.self_id] = session
+                return
+            store = self.sync_stores.get(bot.self_id)
+            if store is not None:
+                store.add_response(event)
             return
-        asyncio.create_task(process_event(
-            bot,
-            event=Event.new({
-                **event["data"],
-                "self_id": bot.self_id
-            })
-        ))
+        data = event["data"]
+        if self.recorder is not None:
+            self.recorder.record(bot.self_id, data)
+        cache = self.caches.get(bot.self_id)
+        if cache is not None:
+            cache.handle_event(data)
+        links = self.shards.get(bot.self_id)
+        if links:
+            link = links.get(hash(shard_key(data)) % self.mirai_config.mirai_shards)
+            if link is not None:
+                link.send(self.codec.dumps(event))
+                return
+        data["self_id"] = bot.self_id
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter()
+        mirai_event = Event.new(
+            data,
+            trusted=self.mirai_config.mirai_trusted_decode,
+            lazy=self.mirai_config.mirai_lazy_message
+        )
+        if metrics is not None:
+            metrics.observe("event_new", time.perf_counter() - start,
+                bot=bot.self_id, type=mirai_event.type)
+            metrics.inc("events", bot=bot.self_id, type=mirai_event.type)
+        dispatcher = self.dispatchers.get(bot.self_id) if dispatch else None
+        if dispatcher is not None:
+            dispatcher.put(bot, mirai_event)
+            return None
+        return asyncio.create_task(process_event(bot, event=mirai_event))
 
     async def _call_api(self, bot: Bot, api: str,
         subcommand: Optional[Literal['get', 'update']] = None, **data: Any) -> Any:
-        sync_id = SyncIDStore.get_id()
         api = snake_to_camel(api)
-        data = {snake_to_camel(k): v for k, v in data.items()}
-        body = {
-            'syncId': sync_id,
-            'command': api,
-            'subcommand': subcommand,
-            'content': {
-                **data,
-            }
-        }
-        
-        await cast(WebSocket, self.connections[str(bot.self_id)]).send(
-            json.dumps(
-                body,
-                cls=MiraiDataclassEncoder
+        data = {snake_to_camel(k): export(v) for k, v in data.items()}
+        if api in UPLOAD_TYPES and isinstance(data.get("messageChain"), list):
+            await upload_segments(bot, api, data["messageChain"])
+
+        if api == "messageFromId" and subcommand is None:
+            index = self.message_indexes.get(str(bot.self_id))
+            target = data.get("target")
+            if index is not None and target is not None:
+                message = index.get(data.get("messageId", data.get("id")), target)
+                if message is not None:
+                    return {"code": 0, "msg": "", "data": message.export()}
+
+        scheduler = self.schedulers.get(str(bot.self_id))
+        if scheduler is not None and api in SEND_APIS:
+            return await scheduler.submit(
+                api, data, lambda api, data: self._request(bot, api, subcommand, data)
             )
-        )
+        cache = self.caches.get(str(bot.self_id))
+        if cache is not None:
+            key = cache_key(api, subcommand, data)
+            if key is not None:
+                return await cache.fetch(
+                    key, lambda: self._request(bot, api, subcommand, data)
+                )
+            result = await self._request(bot, api, subcommand, data)
+            cache.handle_api(api, subcommand, data)
+            return result
+        return await self._request(bot, api, subcommand, data)
 
-        result: Dict[str, Any] = await SyncIDStore.fetch_response(
-            sync_id, timeout=self.config.api_timeout)
+    async def _request(self, bot: Bot, api: str,
+        subcommand: Optional[Literal['get', 'update']], data: Dict[str, Any]) -> Any:
+        result = await self._send_command(bot, api, subcommand, data)
 
         if ('data') not in result or (result['data']).get('code') not in (None, 0):
+            if self.metrics is not None:
+                self.metrics.inc("api_errors", bot=bot.self_id, command=api)
             raise ActionFailed(
                 f'{self.get_name()} | {result.get("data") or result}'
             )
 
         return result['data']
+
+    async def _send_command(self, bot: Bot, api: str,
+        subcommand: Optional[Literal['get', 'update']], data: Dict[str, Any]) -> Dict[str, Any]:
+        reply = webhook_reply.get()
+        if reply is not None and reply.claim(str(bot.self_id), api, subcommand, data):
+            if self.metrics is not None:
+                self.metrics.inc("webhook_replies", bot=bot.self_id, command=api)
+            return {'syncId': '', 'data': {'code': 0, 'msg': '', 'messageId': -1}}
+
+        websocket = self.connections.get(str(bot.self_id))
+        store = self.sync_stores.get(str(bot.self_id))
+        if websocket is None or store is None:
+            raise ApiNotAvailable(f'Bot {bot.self_id} is not connected')
+
+        if isinstance(websocket, PollingConnection):
+            request = websocket.command(api, subcommand, data)
+        else:
+            async def send(sync_id: str):
+                await websocket.send(self.codec.dumps({
+                    'syncId': sync_id,
+                    'command': api,
+                    'subcommand': subcommand,
+                    'content': {
+                        **data,
+                    }
+                }))
+
+            request = store.request(send, timeout=self.config.api_timeout)
+
+        metrics = self.metrics
+        if metrics is None:
+            return await request
+        start = time.perf_counter()
+        try:
+            return await request
+        except Exception:
+            metrics.inc("api_errors", bot=bot.self_id, command=api)
+            raise
+        finally:
+            metrics.observe("api", time.perf_counter() - start, bot=bot.self_id, command=api)
+
+    def _http_url(self, endpoint: str) -> URL:
+        config = self.mirai_config
+        host = config.mirai_http_host or config.mirai_host
+        port = config.mirai_http_port or config.mirai_port
+        if host is None or port is None:
+            raise ApiNotAvailable('mirai_http_host / mirai_http_port is not configured')
+        return URL(f"http://{host}:{port}/{endpoint}")
+
+    async def _upload(self, bot: Bot, endpoint: str, data: Dict[str, Any],
+        field: str, file: FileInput, name: Optional[str] = None) -> Dict[str, Any]:
+        """通过 mirai-api-http 的 http 接口以 multipart 表单上传文件"""
+        session = self.sessions.get(str(bot.self_id))
+        if session is None:
+            raise ApiNotAvailable(f'Bot {bot.self_id} has no session for uploading')
+
+        send = self.http_client.request if self.http_client is not None else self.request
+        async with open_upload(file, name) as (filename, f):
+            response = await send(Request(
+                "POST",
+                url=self._http_url(endpoint),
+                data={"sessionKey": session, **{k: str(v) for k, v in data.items()}},
+                files={field: (filename, f, None)},
+                timeout=self.mirai_config.mirai_upload_timeout
+            ))
+
+        if response.status_code != 200 or not response.content:
+            raise NetworkError(f'{self.get_name()} | upload failed with HTTP {response.status_code}')
+        result: Dict[str, Any] = self.codec.loads(response.content)
+        if result.get('code') not in (None, 0):
+            raise ActionFailed(f'{self.get_name()} | {result}')
+        return result
@@ -1,4 +1,5 @@
-from typing import Any, Optional, Union
+import asyncio
+from typing import Any, Dict, List, Tuple, Iterable, Optional, Union
 from nonebot.typing import overrides
 
 from nonebot.adapters import Bot as BaseBot
@@ -7,6 +8,8 @@ from .event.message import FriendMessage, GroupMessage, TempMessage
 
 from .event import Event
 from .message import MessageChain, MessageSegment
+from .index import MessageIndex
+from .upload import FileInput, upload_file, upload_image, upload_voice
 
 
 class Bot(BaseBot):
@@ -50,3 +53,54 @@ class Bot(BaseBot):
                                                 quote=quote)
         else:
             raise ValueError(f'Unsupported event type {event!r}.')
+
+    @property
+    def message_index(self) -> Optional[MessageIndex]:
+        """最近收到的消息索引, ``mirai_message_index_size`` 为 0 时为 ``None``"""
+        return self.adapter.message_indexes.get(self.self_id)
+
+    async def upload_image(self, *, file: FileInput, type: str = 'group') -> Dict[str, Any]:
+        """通过 http 接口上传图片, 返回 ``imageId`` 与 ``url``"""
+        return await upload_image(self, file, type)
+
+    async def upload_voice(self, *, file: FileInput, type: str = 'group') -> Dict[str, Any]:
+        """通过 http 接口上传语音, 返回 ``voiceId`` 与 ``url``"""
+        return await upload_voice(self, file, type)
+
+    async def upload_file(self, *, target: int, file: FileInput, path: str = '',
+                          name: Optional[str] = None) -> Dict[str, Any]:
+        """通过 http 接口上传群文件"""
+        return await upload_file(self, target, file, path, name)
+
+    async def call_many(
+        self,
+        calls: Iterable[Tuple[str, Dict[str, Any]]],
+        *,
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        :说明:
+
+          并发调用多个 api, 按 ``calls`` 的顺序返回结果
+
+          所有请求共用同一个 websocket 连接, 同时等待响应的请求数量受 ``mirai_api_max_pending`` 限制
+
+        :参数:
+
+          * ``calls: Iterable[Tuple[str, Dict[str, Any]]]``: ``(api, 参数)`` 列表
+          * ``concurrency: Optional[int]``: 本次调用同时发出的请求数量上限
+          * ``return_exceptions: bool``: 是否将失败请求的异常作为结果返回, 否则抛出第一个异常
+        """
+        semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+        async def call(api: str, data: Dict[str, Any]) -> Any:
+            if semaphore is None:
+                return await self.call_api(api, **data)
+            async with semaphore:
+                return await self.call_api(api, **data)
+
+        return await asyncio.gather(
+            *(call(api, data) for api, data in calls),
+            return_exceptions=return_exceptions
+        )
@@ -1,9 +1,11 @@
-from typing import Literal, Union, Optional, overload
+from typing import Any, Dict, List, Tuple, Iterable, Literal, Union, Optional, overload
 
 from nonebot.adapters import Bot as BaseBot
 
 from .event import Event
 from .message import MessageChain, MessageSegment
+from .index import MessageIndex
+from .upload import FileInput
 
 
 class Bot(BaseBot):
@@ -40,6 +42,91 @@ class Bot(BaseBot):
         """
         ...
 
+    @property
+    def message_index(self) -> Optional[MessageIndex]:
+        """
+        :说明:
+
+            最近收到的消息索引, 可在本地解析回复与撤回的消息
+
+            ``mirai_message_index_size`` 为 0 时为 ``None``
+        """
+        ...
+
+    async def upload_image(self, *, file: FileInput, type: str = 'group') -> Dict[str, Any]:
+        """
+        :说明:
+
+            通过 mirai-api-http 的 http 接口上传图片, 文件以 multipart 表单分块发送
+
+        :参数:
+
+            * ``file: FileInput`` 本地路径, bytes, 二进制文件对象或异步产生 bytes 的迭代器
+            * ``type: str`` ``group``, ``friend`` 或 ``temp``
+
+        :返回:
+
+            ``{"imageId": ..., "url": ...}``
+        """
+        ...
+
+    async def upload_voice(self, *, file: FileInput, type: str = 'group') -> Dict[str, Any]:
+        """
+        :说明:
+
+            通过 mirai-api-http 的 http 接口上传语音, 目前仅支持 ``group`` 类型
+
+        :参数:
+
+            * ``file: FileInput`` 语音文件
+
+        :返回:
+
+            ``{"voiceId": ..., "url": ...}``
+        """
+        ...
+
+    async def upload_file(
+        self, *,
+        target: int,
+        file: FileInput,
+        path: str = '',
+        name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        :说明:
+
+            通过 mirai-api-http 的 http 接口上传群文件
+
+        :参数:
+
+            * ``target: int`` 群号
+            * ``file: FileInput`` 文件
+            * ``path: str`` 上传到的群文件目录 id, 为空时上传到根目录
+            * ``name: Optional[str]`` 群文件中的文件名, 不填写时使用本地文件名
+        """
+        ...
+
+    async def call_many(
+        self,
+        calls: Iterable[Tuple[str, Dict[str, Any]]],
+        *,
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        :说明:
+
+            并发调用多个 api, 按 ``calls`` 的顺序返回结果
+
+        :参数:
+
+            * ``calls: Iterable[Tuple[str, Dict[str, Any]]]``: ``(api, 参数)`` 列表
+            * ``concurrency: Optional[int]``: 本次调用同时发出的请求数量上限
+            * ``return_exceptions: bool``: 是否将失败请求的异常作为结果返回, 否则抛出第一个异常
+        """
+        ...
+
     async def about(self):
         """
         :说明:
@@ -52,15 +139,18 @@ class Bot(BaseBot):
         """
         ...
 
-    async def message_from_id(self, *, id: int):
+    async def message_from_id(self, *, id: int, target: Optional[int] = None):
         """
         :说明:
 
             获取消息 id 的内容
 
+            开启消息索引且填写 ``target`` 时, 索引中的消息直接在本地返回, 不请求 mirai-api-http
+
         :参数:
 
             * ``id: int`` 消息 id
+            * ``target: Optional[int]`` 消息所在的群号或好友 qq
         """
         ...
 
@@ -0,0 +1,179 @@
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Tuple, Callable, Hashable, Optional, Awaitable
+
+MEMBER_EVENTS = (
+    'MemberJoinEvent', 'MemberLeaveEventKick', 'MemberLeaveEventQuit',
+    'MemberCardChangeEvent', 'MemberSpecialTitleChangeEvent', 'MemberPermissionChangeEvent',
+    'MemberMuteEvent', 'MemberUnmuteEvent', 'MemberHonorChangeEvent'
+)
+GROUP_EVENTS = (
+    'BotJoinGroupEvent', 'BotLeaveEventActive', 'BotLeaveEventKick', 'BotLeaveEventDisband',
+    'BotGroupPermissionChangeEvent', 'GroupNameChangeEvent'
+)
+FRIEND_EVENTS = ('FriendNickChangedEvent', 'FriendAddEvent', 'FriendDeleteEvent')
+
+
+def cache_key(api: str, subcommand: Optional[str], data: Dict[str, Any]) -> Optional[Tuple]:
+    """获取可缓存 api 的缓存键, 不可缓存时返回 ``None``"""
+    if api in ('groupList', 'friendList'):
+        return (api,)
+    if api == 'memberList':
+        return (api, data.get('target'))
+    if api == 'memberInfo' and subcommand in (None, 'get'):
+        return (api, data.get('target'), data.get('memberId'))
+    return None
+
+
+def _retrieve_exception(task: "asyncio.Future") -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+class MetadataCache:
+    """
+    :说明:
+
+      单个 Bot 的群、群成员与好友信息缓存
+
+      缓存 ``group_list``, ``friend_list``, ``member_list`` 与 ``member_info`` 的响应,
+      收到群成员、群与好友变化的通知事件, 或通过 api 修改相关信息后, 对应的缓存失效
+
+      返回的响应为缓存中的同一对象, 调用方不应修改
+
+    :参数:
+
+      * ``ttl: float``: 缓存的有效时间, 单位为秒
+      * ``maxsize: int``: 缓存条目数量上限, 超出时淘汰最久未使用的条目
+    """
+
+    def __init__(self, ttl: float = 300, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = max(maxsize, 1)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._loading: Dict[Hashable, "asyncio.Future"] = {}
+        self._generation = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """导出缓存统计"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """获取未过期的缓存, 不存在时返回 ``None``"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def fetch(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        :说明:
+
+          获取缓存, 未命中时调用 ``loader`` 加载; 同一缓存键同时只加载一次,
+          加载在单独的任务中进行, 调用方被取消时加载仍会完成并写入缓存
+
+        :参数:
+
+          * ``key: Hashable``: 缓存键
+          * ``loader: Callable[[], Awaitable[Any]]``: 加载数据的函数
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        loading = self._loading.get(key)
+        if loading is None:
+            loading = self._loading[key] = asyncio.ensure_future(self._load(key, loader))
+            loading.add_done_callback(_retrieve_exception)
+        return await asyncio.shield(loading)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """在单独的任务中加载, 发起加载的调用方被取消时不影响其他等待同一缓存键的调用方"""
+        generation = self._generation
+        try:
+            value = await loader()
+        finally:
+            self._loading.pop(key, None)
+        if generation == self._generation:
+            self.set(key, value)
+        return value
+
+    def _discard(self, key: Hashable) -> None:
+        self._generation += 1
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def invalidate_member(self, group: Any, member: Any) -> None:
+        """使群成员列表与该成员信息的缓存失效"""
+        self._discard(('memberList', group))
+        self._discard(('memberInfo', group, member))
+
+    def invalidate_group(self, group: Any) -> None:
+        """使群列表与该群全部成员信息的缓存失效"""
+        self._generation += 1
+        for key in [
+            key for key in self._entries
+            if key[0] == 'groupList' or (len(key) > 1 and key[1] == group)
+        ]:
+            del self._entries[key]
+            self.invalidations += 1
+
+    def invalidate_friends(self) -> None:
+        """使好友列表的缓存失效"""
+        self._discard(('friendList',))
+
+    def handle_event(self, data: Dict[str, Any]) -> None:
+        """根据未解析的通知事件数据使相关缓存失效"""
+        type_ = data.get('type')
+        if type_ in MEMBER_EVENTS:
+            member = data.get('member') or {}
+            self.invalidate_member((member.get('group') or {}).get('id'), member.get('id'))
+        elif type_ in GROUP_EVENTS:
+            group = data.get('group') or (data.get('member') or {}).get('group') or {}
+            self.invalidate_group(group.get('id'))
+        elif type_ in FRIEND_EVENTS:
+            self.invalidate_friends()
+
+    def handle_api(self, api: str, subcommand: Optional[str], data: Dict[str, Any]) -> None:
+        """通过 api 修改信息后使相关缓存失效"""
+        if api in ('kick', 'mute', 'unmute', 'memberAdmin') or \
+                (api == 'memberInfo' and subcommand == 'update'):
+            self.invalidate_member(data.get('target'), data.get('memberId'))
+        elif api == 'quit' or (api == 'groupConfig' and subcommand == 'update'):
+            self.invalidate_group(data.get('target'))
+        elif api == 'deleteFriend':
+            self.invalidate_friends()
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def close(self) -> None:
+        """清空缓存, 在连接断开时调用"""
+        self.clear()
@@ -0,0 +1,143 @@
+import json
+import dataclasses
+from typing import Any, Dict, Type, Union
+
+from .message import MessageChain, MessageSegment
+from .utils import MiraiDataclassEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+def export(value: Any) -> Any:
+    """
+    将 api 参数中的消息链与消息段转换为可以被直接序列化的结构
+
+    只递归进入消息内容, 即消息链, 消息段以及 list 参数 (如转发消息的 ``nodeList``),
+    消息段数据中嵌套的消息链 (如 ``Forward`` 的 ``messageChain``) 一并导出; 其余参数原样返回
+    """
+    if isinstance(value, (list, MessageSegment)):
+        return _export_content(value)
+    return value
+
+
+def _export_content(value: Any) -> Any:
+    if isinstance(value, MessageSegment):
+        data = value.data
+        for item in data.values():
+            if isinstance(item, (list, dict, MessageSegment)):
+                return {'type': value.type.value, **{k: _export_content(v) for k, v in data.items()}}
+        return {'type': value.type.value, **data}
+    if isinstance(value, list):
+        return [_export_content(item) for item in value]
+    if isinstance(value, dict):
+        return {k: _export_content(v) for k, v in value.items()}
+    return value
+
+
+def _default(o: Any) -> Any:
+    if isinstance(o, MessageSegment):
+        return o.as_dict()
+    if dataclasses.is_dataclass(o):
+        return {f.name: getattr(o, f.name) for f in dataclasses.fields(o)}
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class JSONCodec:
+    """
+    :说明:
+
+      websocket 数据帧的 JSON 编解码器基类, 使用标准库 ``json``
+
+      ``loads`` 同时接受 ``str`` 与 ``bytes`` 数据帧, ``dumps`` 返回 ``str``
+
+      ``dumps`` 的数据中的消息链与消息段应已由 ``export`` 导出, ``orjson`` 与 ``msgspec`` 不再对其特殊处理
+    """
+    name = 'json'
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, cls=MiraiDataclassEncoder)
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+
+class MsgspecCodec(JSONCodec):
+    name = 'msgspec'
+
+    def __init__(self):
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._decoder.decode(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self._encoder.encode(obj).decode()
+
+
+class UjsonCodec(JSONCodec):
+    name = 'ujson'
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return ujson.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return ujson.dumps(obj, default=_default, ensure_ascii=False)
+
+
+_codecs: Dict[str, Type[JSONCodec]] = {
+    'orjson': OrjsonCodec,
+    'msgspec': MsgspecCodec,
+    'ujson': UjsonCodec,
+    'json': JSONCodec,
+}
+_modules: Dict[str, Any] = {
+    'orjson': orjson,
+    'msgspec': msgspec,
+    'ujson': ujson,
+    'json': json,
+}
+
+
+def get_codec(name: str = 'auto') -> JSONCodec:
+    """
+    :说明:
+
+      获取指定名称的 JSON 编解码器
+
+    :参数:
+
+      * ``name: str``: 编解码器名称, 可选 ``auto``, ``orjson``, ``msgspec``, ``ujson``, ``json``
+
+        ``auto`` 时按上述顺序选择第一个已安装的实现
+    """
+    if name == 'auto':
+        name = next(n for n, module in _modules.items() if module is not None)
+    if name not in _codecs:
+        raise ValueError(f'Unknown json codec {name!r}')
+    if _modules[name] is None:
+        raise ValueError(f'Json codec {name!r} is not installed')
+    return _codecs[name]()
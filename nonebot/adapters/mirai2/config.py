@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import Field, Extra, BaseModel
 
@@ -15,6 +15,56 @@ class Config(BaseModel):
       - ``mirai_qq``: mirai-api-http qq 列表
       - ``mirai_reverse``: 是否启用正向 ws
       - ``mirai_access_token``: 反向 ws 专用的对客户端鉴权 token
+      - ``mirai_json_codec``: websocket 数据帧的 JSON 编解码器, 可选 ``auto``, ``orjson``, ``msgspec``, ``ujson``, ``json``
+      - ``mirai_nickname_matcher``: 群消息昵称匹配方式, ``regex`` 按正则表达式匹配, ``trie`` 按前缀树匹配最长的昵称
+      - ``mirai_trusted_decode``: 信任 mirai-api-http 推送的数据, 跳过事件的 pydantic 校验直接构造
+      - ``mirai_lazy_message``: 延迟解析消息事件的消息链, 首次访问 ``message_chain`` 时才构造消息段
+      - ``mirai_api_max_pending``: 每个连接同时等待响应的 api 请求数量上限, 超出时新的请求将等待
+      - ``mirai_event_workers``: 每个 Bot 处理事件的 worker 数量, 为 0 时每个事件单独创建任务
+      - ``mirai_event_queue_size``: 每个 worker 的事件队列长度
+      - ``mirai_event_overflow``: 事件队列已满时的处理方式, 可选 ``drop``, ``drop_oldest``
+      - ``mirai_send_rate``: 每个 Bot 每秒最多发送的消息数, 不填写时不限制
+      - ``mirai_send_burst``: 每个 Bot 允许突发发送的消息数
+      - ``mirai_target_send_rate``: 对每个群/好友每秒最多发送的消息数, 不填写时不限制
+      - ``mirai_target_send_burst``: 对每个群/好友允许突发发送的消息数
+      - ``mirai_send_coalesce``: 限速排队时是否将同一目标相邻的纯文本消息合并发送
+      - ``mirai_connect_timeout``: 正向 ws 建立连接与等待验证结果的超时时间
+      - ``mirai_connect_concurrency``: 正向 ws 同时进行握手的账号数量上限, 为 0 时不限制
+      - ``mirai_reconnect_interval``: 正向 ws 首次重连前的等待时间, 之后每次失败翻倍
+      - ``mirai_reconnect_max_interval``: 正向 ws 重连等待时间的上限
+      - ``mirai_reconnect_jitter``: 重连等待时间的随机抖动比例, 避免多个账号同时重连
+      - ``mirai_heartbeat_interval``: 通过 ``about`` 命令探测连接的间隔, 不填写时不探测
+      - ``mirai_heartbeat_timeout``: 心跳探测的超时时间, 超时后主动断开并重连
+      - ``mirai_cache``: 是否缓存群列表, 好友列表, 群成员列表与群成员信息, 收到相关通知事件时自动失效;
+        分片进程自身不缓存, 其 api 调用由主进程代为调用时经过主进程的缓存
+      - ``mirai_cache_ttl``: 缓存的有效时间, 单位为秒
+      - ``mirai_cache_size``: 每个 Bot 缓存的条目数量上限
+      - ``mirai_cache_warmup``: 连接建立后是否预先加载群列表, 好友列表与全部群成员列表
+      - ``mirai_message_index_size``: 每个 Bot 在内存中索引的最近消息总数, 用于本地解析回复与撤回的消息, 为 0 时不索引
+      - ``mirai_message_index_target_size``: 每个群/好友索引的最近消息数量
+      - ``mirai_message_index_max_bytes``: 每个 Bot 的消息索引估算的内存占用上限, 为 0 时只按消息数量限制
+      - ``mirai_http_host``: mirai-api-http 的 http 接口地址, 用于上传文件, 不填写时使用 ``mirai_host``
+      - ``mirai_http_port``: mirai-api-http 的 http 接口端口, 不填写时使用 ``mirai_port``
+      - ``mirai_upload_timeout``: 上传文件的超时时间
+      - ``mirai_media_cache``: 按内容哈希缓存上传得到的 imageId/voiceId, 开启后 ``base64`` 与本地 ``path`` 的图片/语音也改为通过 http 接口上传
+      - ``mirai_media_cache_size``: 媒体缓存的条目数量上限
+      - ``mirai_media_cache_path``: 媒体缓存的 sqlite 数据库文件路径, 不填写时只缓存在内存中
+      - ``mirai_metrics``: 是否记录解码, 事件构造, 预处理, 事件处理与 api 调用的耗时指标
+      - ``mirai_metrics_path``: 以 Prometheus 文本格式导出指标的 http 路径, 为空时不开放
+      - ``mirai_ws_path``: 正向 ws 连接的路径, 作为分片进程连接主进程时填写 ``/mirai2/shard``
+      - ``mirai_shards``: 主进程的分片数量, 大于 0 时开放 ``/mirai2/shard`` 供分片进程连接
+      - ``mirai_shard``: 分片进程的分片序号, 范围为 ``0`` 至 ``mirai_shards - 1``
+      - ``mirai_http_polling``: 正向连接时通过 http 接口轮询 ``fetchMessage`` 获取事件, 代替 websocket
+      - ``mirai_poll_interval``: http 轮询没有新事件时轮询间隔的上限, 有事件时自动缩短
+      - ``mirai_poll_min_count``: http 轮询每次获取事件数量的下限, 取满一批时自动翻倍
+      - ``mirai_poll_max_count``: http 轮询每次获取事件数量的上限
+      - ``mirai_http_pool_size``: http 轮询模式下 api 请求连接池的连接数量上限, 需要安装 ``httpx``
+      - ``mirai_webhook``: 是否开放接收 mirai-api-http webhook 推送的 http 路由, 配置了 ``mirai_access_token`` 时需要在请求头中携带;
+        没有 websocket 或 http 轮询连接的 Bot 只能通过快速回复发送消息, 其余 api 调用抛出 ``ApiNotAvailable``; 之后建立的连接会接管该 Bot
+      - ``mirai_webhook_path``: webhook 路由的路径
+      - ``mirai_webhook_reply_timeout``: 等待事件处理产生快速回复的时间上限, 期间第一条发送的消息随 webhook 响应返回; 开启发送限速时消息经过发送队列发出, 不作为快速回复
+      - ``mirai_record_path``: 将收到的原始事件追加录制到此文件, 可通过 ``python -m nonebot.adapters.mirai2.replay`` 回放, 不填写时不录制
+      - ``mirai_record_compress``: 录制文件是否以 gzip 压缩
     """
 
     verify_key: str = Field(
@@ -25,6 +75,54 @@ class Config(BaseModel):
     mirai_qq: Optional[List[str]] = None
     mirai_forward: Optional[bool] = True
     mirai_access_token: Optional[str] = None
+    mirai_json_codec: str = "auto"
+    mirai_trusted_decode: bool = False
+    mirai_lazy_message: bool = False
+    mirai_nickname_matcher: Literal["regex", "trie"] = "regex"
+    mirai_api_max_pending: int = 1024
+    mirai_event_workers: int = 0
+    mirai_event_queue_size: int = 1000
+    mirai_event_overflow: Literal["drop", "drop_oldest"] = "drop_oldest"
+    mirai_send_rate: Optional[float] = None
+    mirai_send_burst: int = 5
+    mirai_target_send_rate: Optional[float] = None
+    mirai_target_send_burst: int = 3
+    mirai_send_coalesce: bool = False
+    mirai_connect_timeout: float = 3
+    mirai_connect_concurrency: int = 0
+    mirai_reconnect_interval: float = 3
+    mirai_reconnect_max_interval: float = 60
+    mirai_reconnect_jitter: float = 0.5
+    mirai_heartbeat_interval: Optional[float] = None
+    mirai_heartbeat_timeout: float = 5
+    mirai_cache: bool = False
+    mirai_cache_ttl: float = 300
+    mirai_cache_size: int = 1024
+    mirai_cache_warmup: bool = False
+    mirai_message_index_size: int = 0
+    mirai_message_index_target_size: int = 200
+    mirai_message_index_max_bytes: int = 32 * 1024 * 1024
+    mirai_http_host: Optional[str] = None
+    mirai_http_port: Optional[int] = None
+    mirai_upload_timeout: float = 60
+    mirai_media_cache: bool = False
+    mirai_media_cache_size: int = 10000
+    mirai_media_cache_path: Optional[str] = None
+    mirai_metrics: bool = False
+    mirai_metrics_path: Optional[str] = "/mirai2/metrics"
+    mirai_ws_path: str = "/all"
+    mirai_shards: int = 0
+    mirai_shard: Optional[int] = None
+    mirai_http_polling: bool = False
+    mirai_poll_interval: float = 1.0
+    mirai_poll_min_count: int = 10
+    mirai_poll_max_count: int = 200
+    mirai_http_pool_size: int = 10
+    mirai_webhook: bool = False
+    mirai_webhook_path: str = "/mirai2/webhook"
+    mirai_webhook_reply_timeout: float = 1.0
+    mirai_record_path: Optional[str] = None
+    mirai_record_compress: bool = False
 
     class Config:
         extra = Extra.ignore
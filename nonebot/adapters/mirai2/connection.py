@@ -0,0 +1,95 @@
+import time
+import random
+from typing import Any, Dict, Optional
+
+
+class Backoff:
+    """
+    :说明:
+
+      带随机抖动的指数退避, 用于计算重连前的等待时间
+
+    :参数:
+
+      * ``initial: float``: 首次重连前的等待时间
+      * ``maximum: float``: 等待时间上限
+      * ``jitter: float``: 随机抖动比例, 实际等待时间在 ``[delay * (1 - jitter), delay]`` 之间
+    """
+
+    def __init__(self, initial: float, maximum: float, jitter: float = 0.5):
+        self.initial = initial
+        self.maximum = max(maximum, initial)
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.attempts = 0
+
+    def next(self) -> float:
+        """获取下一次重连前的等待时间"""
+        delay = min(self.maximum, self.initial * 2 ** self.attempts)
+        if delay < self.maximum:
+            self.attempts += 1
+        return delay * (1 - self.jitter * random.random())
+
+    def reset(self) -> None:
+        """连接成功后重置退避"""
+        self.attempts = 0
+
+
+class ConnectionStats:
+    """
+    :说明:
+
+      单个 Bot 连接的状态统计
+
+      * ``state``: ``connecting``, ``connected`` 或 ``disconnected``
+      * ``connects`` / ``disconnects``: 建立与断开连接的次数
+      * ``failures``: 连续连接失败的次数
+      * ``latency``: 最近一次心跳的往返时间, 单位为秒
+      * ``latency_avg``: 心跳往返时间的指数移动平均
+    """
+
+    def __init__(self):
+        self.state = 'disconnected'
+        self.connected_at: Optional[float] = None
+        self.connects = 0
+        self.disconnects = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.latency: Optional[float] = None
+        self.latency_avg: Optional[float] = None
+
+    def connecting(self) -> None:
+        self.state = 'connecting'
+
+    def connected(self) -> None:
+        self.state = 'connected'
+        self.connected_at = time.time()
+        self.connects += 1
+        self.failures = 0
+
+    def disconnected(self, error: Optional[BaseException] = None) -> None:
+        if self.state == 'connected':
+            self.disconnects += 1
+        elif error is not None:
+            self.failures += 1
+        self.state = 'disconnected'
+        self.connected_at = None
+        if error is not None:
+            self.last_error = repr(error)
+
+    def heartbeat(self, latency: float) -> None:
+        self.latency = latency
+        self.latency_avg = latency if self.latency_avg is None \
+            else self.latency_avg * 0.8 + latency * 0.2
+
+    def as_dict(self) -> Dict[str, Any]:
+        """导出可以被正常json序列化的结构体"""
+        return {
+            'state': self.state,
+            'connected_at': self.connected_at,
+            'connects': self.connects,
+            'disconnects': self.disconnects,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'latency': self.latency,
+            'latency_avg': self.latency_avg,
+        }
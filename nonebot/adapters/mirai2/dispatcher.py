@@ -0,0 +1,127 @@
+import asyncio
+from typing import TYPE_CHECKING, Dict, List, Tuple, Literal, Optional
+
+from nonebot.utils import escape_tag
+
+from . import log
+from .event import Event
+from .preprocess import process_event
+
+if TYPE_CHECKING:
+    from .bot import Bot
+
+OverflowPolicy = Literal['drop', 'drop_oldest']
+
+
+class EventDispatcher:
+    """
+    :说明:
+
+      单个 Bot 的事件处理队列
+
+      事件按 ``get_session_id()`` 分配到固定的 worker, 同一会话的事件按接收顺序依次处理,
+      不同会话的事件最多由 ``workers`` 个 worker 并发处理
+
+    :参数:
+
+      * ``workers: int``: worker 数量, 即最大并发数
+      * ``queue_size: int``: 每个 worker 的队列长度
+      * ``overflow: OverflowPolicy``: 队列已满时的处理方式
+
+        * ``drop``: 丢弃新到达的事件
+        * ``drop_oldest``: 丢弃队列中最早的事件
+
+      api 的响应与事件共用同一个 websocket 接收循环, 因此队列已满时不会暂停接收
+
+      适配器为每个 Bot 保留同一个实例, 断线重连不会中断正在处理与排队中的事件
+    """
+
+    def __init__(self, workers: int, queue_size: int = 1000,
+                 overflow: OverflowPolicy = 'drop_oldest'):
+        if overflow not in ('drop', 'drop_oldest'):
+            raise ValueError(f'Unknown overflow policy {overflow!r}')
+        self.overflow = overflow
+        self.received = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.closed = False
+        self._next = 0
+        self._queues: List["asyncio.Queue[Optional[Tuple[Bot, Event]]]"] = [
+            asyncio.Queue(queue_size) for _ in range(workers)
+        ]
+        self._tasks: List["asyncio.Task"] = [
+            asyncio.create_task(self._worker(queue)) for queue in self._queues
+        ]
+
+    @property
+    def queued(self) -> int:
+        """等待处理的事件数量"""
+        return sum(queue.qsize() for queue in self._queues)
+
+    def stats(self) -> Dict[str, int]:
+        """导出事件处理统计"""
+        return {
+            'workers': len(self._queues),
+            'queued': self.queued,
+            'received': self.received,
+            'processed': self.processed,
+            'failed': self.failed,
+            'dropped': self.dropped,
+        }
+
+    def _select(self, event: Event) -> "asyncio.Queue[Optional[Tuple[Bot, Event]]]":
+        try:
+            session_id = event.get_session_id()
+        except (ValueError, NotImplementedError):
+            self._next = (self._next + 1) % len(self._queues)
+            return self._queues[self._next]
+        return self._queues[hash(session_id) % len(self._queues)]
+
+    def put(self, bot: "Bot", event: Event) -> None:
+        """将事件放入对应会话的队列"""
+        if self.closed:
+            self.dropped += 1
+            return
+        self.received += 1
+        queue = self._select(event)
+        if queue.full():
+            self.dropped += 1
+            if self.overflow == 'drop':
+                log.warning(f'Event queue of bot {escape_tag(bot.self_id)} is full, '
+                            f'dropped {escape_tag(event.get_event_name())}')
+                return
+            _, dropped = queue.get_nowait()  # type: ignore
+            queue.task_done()
+            log.warning(f'Event queue of bot {escape_tag(bot.self_id)} is full, '
+                        f'dropped {escape_tag(dropped.get_event_name())}')
+        queue.put_nowait((bot, event))
+
+    async def _worker(self, queue: "asyncio.Queue[Optional[Tuple[Bot, Event]]]") -> None:
+        while not (self.closed and queue.empty()):
+            item = await queue.get()
+            if item is None:
+                return
+            bot, event = item
+            try:
+                await process_event(bot, event)
+            except Exception as e:
+                self.failed += 1
+                log.error(f'<r><bg #f8bbd0>Error while processing event '
+                          f'{escape_tag(event.get_event_name())}</bg #f8bbd0></r>', e)
+            finally:
+                self.processed += 1
+                queue.task_done()
+
+    def close(self) -> None:
+        """不再接收新的事件, worker 处理完队列中已有的事件后退出"""
+        if self.closed:
+            return
+        self.closed = True
+        for queue in self._queues:
+            if not queue.full():
+                queue.put_nowait(None)
+
+    async def wait_closed(self) -> None:
+        """等待全部 worker 退出"""
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -1,9 +1,12 @@
 import json
 from enum import Enum
+from weakref import WeakValueDictionary
+from contextvars import ContextVar
 from typing_extensions import Literal
-from typing import Any, Dict, Optional, Type
+from typing import Any, Dict, List, Tuple, Optional, Type, Callable, ClassVar
 
 from pydantic import BaseModel, Field, ValidationError
+from pydantic.fields import SHAPE_SINGLETON, ModelField
 
 from nonebot.typing import overrides
 from nonebot.utils import escape_tag
@@ -11,6 +14,7 @@ from nonebot.adapters import Event as BaseEvent
 from nonebot.adapters import Message as BaseMessage
 
 from .. import log
+from ..message import MessageChain
 
 
 class UserPermission(str, Enum):
@@ -28,7 +32,55 @@ class UserPermission(str, Enum):
     MEMBER = 'MEMBER'
 
 
-class GroupInfo(BaseModel):
+_intern_bot: ContextVar[Optional[Any]] = ContextVar('mirai2_intern_bot', default=None)
+"""``Event.new`` 正在构造的事件所属的 Bot, 信息模型按此 Bot 共用实例"""
+
+
+class InternedModel(BaseModel):
+    """
+    :说明:
+
+      信息模型, 同一个 Bot 收到的 ``id`` 与字段值都相同的数据共用同一个实例
+
+      只在 ``Event.new`` 构造事件时共用, 其他情况下每次创建新的实例; 实例在不再被引用后自动释放.
+      实例仍可修改, 修改后或字段值变化 (如群名修改) 后收到的数据得到新的实例,
+      但修改会反映到此前共用该实例的事件上
+    """
+    __slots__ = ('__weakref__',)
+    _interned: ClassVar["WeakValueDictionary[Tuple[Any, Any], InternedModel]"]
+    _intern_fields: ClassVar[Tuple[Tuple[str, str], ...]]
+
+    def __init_subclass__(cls) -> None:
+        super().__init_subclass__()
+        cls._interned = WeakValueDictionary()
+        cls._intern_fields = tuple((name, field.alias) for name, field in cls.__fields__.items())
+
+    @classmethod
+    def intern(cls, data: Dict[str, Any], factory: Callable[[Dict[str, Any]], Any]) -> Any:
+        """查找当前 Bot 下与 ``data`` 相同的实例, 不存在时由 ``factory`` 创建"""
+        bot = _intern_bot.get()
+        if bot is None:
+            return factory(data)
+        key = (bot, data.get('id'))
+        try:
+            instance = cls._interned.get(key)
+        except TypeError:
+            return factory(data)
+        if instance is not None and all(
+            getattr(instance, name) == data.get(alias) for name, alias in cls._intern_fields
+        ):
+            return instance
+        instance = cls._interned[key] = factory(data)
+        return instance
+
+    @classmethod
+    def validate(cls, value: Any) -> Any:
+        if isinstance(value, dict):
+            return cls.intern(value, super().validate)
+        return super().validate(value)
+
+
+class GroupInfo(InternedModel):
     id: int
     name: str
     permission: UserPermission
@@ -45,19 +97,19 @@ class GroupChatInfo(BaseModel):
     group: GroupInfo
 
 
-class PrivateChatInfo(BaseModel):
+class PrivateChatInfo(InternedModel):
     id: int
     nickname: str
     remark: str
 
 
-class StrangerChatInfo(BaseModel):
+class StrangerChatInfo(InternedModel):
     id: int
     nickname: str
     remark: str
 
 
-class OtherChatInfo(BaseModel):
+class OtherChatInfo(InternedModel):
     id: int
     platform: str
 
@@ -72,22 +124,82 @@ class Event(BaseEvent):
     self_id: int
     type: str
 
+    _event_types: ClassVar[Dict[str, Type["Event"]]] = {}
+    _lazy_chain: ClassVar[bool] = False
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        Event._event_types[cls.__name__] = cls
+
     @classmethod
-    def new(cls, data: Dict[str, Any]) -> "Event":
+    def get_event_class(cls, type: str) -> Optional[Type["Event"]]:
         """
-        此事件类的工厂函数, 能够通过事件数据选择合适的子类进行序列化
+        :说明:
+
+          根据 mirai-api-http 的事件 ``type`` 获取对应的事件类, 后定义的同名子类优先
+
+        :参数:
+
+          * ``type: str``: 事件类型
         """
-        type = data['type']
+        return Event._event_types.get(type)
+
+    @classmethod
+    def rebuild_event_types(cls) -> None:
+        """
+        :说明:
+
+          重新扫描 ``Event`` 的全部子类并重建事件类型表
 
+          插件在运行时删除或替换了事件子类时, 可调用此方法使事件类型表失效并重建
+        """
         def all_subclasses(cls: Type[Event]):
-            return set(cls.__subclasses__()).union(
-                [s for c in cls.__subclasses__() for s in all_subclasses(c)])
+            for subclass in cls.__subclasses__():
+                yield subclass
+                yield from all_subclasses(subclass)
+
+        Event._event_types.clear()
+        for subclass in all_subclasses(Event):
+            Event._event_types[subclass.__name__] = subclass
+
+    @classmethod
+    def new(cls, data: Dict[str, Any], trusted: bool = False, lazy: bool = False) -> "Event":
+        """
+        此事件类的工厂函数, 能够通过事件数据选择合适的子类进行序列化
 
-        event_class: Optional[Type[Event]] = None
-        for subclass in all_subclasses(cls):
-            if subclass.__name__ != type:
-                continue
-            event_class = subclass
+        ``trusted`` 为真时跳过 pydantic 校验, 按预编译的字段映射直接构造事件,
+        数据不完整或构造失败时回退到完整校验
+
+        ``lazy`` 为真时消息事件的消息链不在此时解析与校验, 首次访问 ``message_chain`` 时才构造;
+        消息链含有未知的消息类型时与不延迟时一样立即解析
+        """
+        event_class = cls.get_event_class(data['type'])
+
+        raw_chain = None
+        if lazy and event_class is not None and event_class._lazy_chain \
+                and isinstance(data.get('messageChain'), list) \
+                and MessageChain.is_raw_known(data['messageChain']):
+            raw_chain = data['messageChain']
+            data = {**data, 'messageChain': []}
+        token = _intern_bot.set(data.get('self_id'))
+        try:
+            event = cls._new(event_class, data, trusted)
+        finally:
+            _intern_bot.reset(token)
+        if raw_chain is not None and event._lazy_chain:
+            event._defer_chain(raw_chain)  # type: ignore
+        return event
+
+    @classmethod
+    def _new(cls, event_class: Optional[Type["Event"]], data: Dict[str, Any],
+             trusted: bool) -> "Event":
+        if trusted and event_class is not None:
+            try:
+                return _get_decoder(event_class)(data)
+            except (KeyError, TypeError, ValueError) as e:
+                log.debug(
+                    f'Failed to construct {event_class.__name__} from trusted '
+                    f'data: {e!r}. Fallback to validation.')
 
         if event_class is None:
             return Event.parse_obj(data)
@@ -140,3 +252,74 @@ class Event(BaseEvent):
         返回可以被json正常反序列化的结构体
         """
         return json.loads(self.json(**kwargs))
+
+
+_Decoder = Callable[[Any], Any]
+_decoders: Dict[Type[BaseModel], _Decoder] = {}
+
+
+def _get_decoder(model: Type[BaseModel]) -> _Decoder:
+    """获取 ``model`` 的免校验构造函数, 首次调用时根据字段定义编译"""
+    decoder = _decoders.get(model)
+    if decoder is None:
+        decoder = _decoders[model] = _compile_decoder(model)
+    return decoder
+
+
+def _compile_field(model: Type[BaseModel], field: ModelField) -> Optional[_Decoder]:
+    type_ = field.type_
+    if not isinstance(type_, type):
+        return None
+    if field.shape != SHAPE_SINGLETON:
+        def validate(value: Any) -> Any:
+            value, errors = field.validate(value, {}, loc=field.alias, cls=model)
+            if errors:
+                raise ValueError(errors)
+            return value
+        return validate
+    if issubclass(type_, MessageChain):
+        return type_.from_raw
+    if issubclass(type_, BaseModel):
+        return _get_decoder(type_)
+    if issubclass(type_, Enum):
+        return type_
+    if type_ in (int, str, float, bool):
+        return lambda value: value if type(value) is type_ else type_(value)
+    return None
+
+
+def _compile_decoder(model: Type[BaseModel]) -> _Decoder:
+    fields: List[Tuple[str, str, bool, ModelField, Optional[_Decoder]]] = [
+        (name, field.alias, field.required, field, _compile_field(model, field))
+        for name, field in model.__fields__.items()
+    ]
+
+    # MessageChain.from_raw 会修改传入的数据, 放到其余字段都构造成功后再调用,
+    # 以便构造失败时回退到带校验的解析仍能使用完整的原始数据
+    chains = {name for name, _, _, field, _ in fields
+              if isinstance(field.type_, type) and issubclass(field.type_, MessageChain)
+              and field.shape == SHAPE_SINGLETON}
+
+    def decode(data: Dict[str, Any]) -> BaseModel:
+        values: Dict[str, Any] = {}
+        fields_set = set()
+        deferred = []
+        for name, alias, required, field, convert in fields:
+            if alias in data:
+                value = data[alias]
+                if convert is not None and value is not None:
+                    if name in chains:
+                        deferred.append((name, convert, value))
+                    else:
+                        value = convert(value)
+                values[name] = value
+                fields_set.add(name)
+            elif required:
+                raise KeyError(alias)
+        for name, convert, value in deferred:
+            values[name] = convert(value)
+        return model.construct(fields_set, **values)
+
+    if issubclass(model, InternedModel):
+        return lambda data: model.intern(data, decode)
+    return decode
@@ -1,6 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
-from typing import Any, Literal, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, Dict, List, Literal, Optional
 
 from nonebot.typing import overrides
 
@@ -30,12 +30,73 @@ class MessageQuote(BaseModel):
 
 
 class MessageEvent(Event):
-    """消息事件基类"""
+    """
+    消息事件基类
+
+    延迟解析时 ``message_chain`` 以原始数据保存, 首次访问时才构造为 ``MessageChain``
+    """
     message_chain: MessageChain = Field(alias='messageChain')
     source: Optional[MessageSource] = None
     sender: Any
     quote: Optional[MessageQuote] = None
 
+    _lazy_chain = True
+    _raw_chain: Optional[List[Dict[str, Any]]] = PrivateAttr(None)
+
+    def _defer_chain(self, raw: List[Dict[str, Any]]) -> None:
+        self.__dict__.pop('message_chain', None)
+        self._raw_chain = raw
+
+    @property
+    def raw_message_chain(self) -> Optional[List[Dict[str, Any]]]:
+        """尚未解析的原始消息链, 已经解析或未开启延迟解析时为 ``None``"""
+        return self._raw_chain
+
+    def _load_chain(self) -> None:
+        raw = self._raw_chain
+        if raw is None:
+            return
+        values = self.__dict__
+        others = {name: values.pop(name) for name in list(values)}
+        for name in self.__fields__:
+            if name == 'message_chain':
+                values[name] = MessageChain.from_raw(raw)
+            elif name in others:
+                values[name] = others.pop(name)
+        values.update(others)
+        self._raw_chain = None
+
+    def __getattr__(self, name: str) -> Any:
+        if name == 'message_chain' and self._raw_chain is not None:
+            self._load_chain()
+            return self.__dict__['message_chain']
+        raise AttributeError(f'{self.__class__.__name__!r} object has no attribute {name!r}')
+
+    def _iter(self, *args: Any, **kwargs: Any):
+        exclude = kwargs.get('exclude')
+        if not (exclude and 'message_chain' in exclude):
+            self._load_chain()
+        return super()._iter(*args, **kwargs)
+
+    def __repr_args__(self):
+        self._load_chain()
+        return super().__repr_args__()
+
+    def normalize_dict(self, **kwargs) -> Dict[str, Any]:
+        raw = self._raw_chain
+        if raw is None or kwargs:
+            return super().normalize_dict(**kwargs)
+        data = super().normalize_dict(exclude={'message_chain'})
+        chain = [
+            {'type': segment.get('type'),
+             'data': {k: v for k, v in segment.items() if k != 'type' and v is not None}}
+            for segment in raw
+        ]
+        return {
+            name: chain if name == 'message_chain' else data[name]
+            for name in (*self.__fields__, *data) if name == 'message_chain' or name in data
+        }
+
     @overrides(Event)
     def get_type(self) -> Literal["message"]:  # noqa
         return 'message'
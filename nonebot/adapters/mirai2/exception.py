@@ -8,7 +8,8 @@ from nonebot.exception import NetworkError as BaseNetworkError
 class MiraiAdapterException(AdapterException):
 
     def __init__(self, *args):
-        super().__init__('mirai', *args)
+        super().__init__('mirai')
+        self.args = args
 
 
 class ActionFailed(BaseActionFailed, MiraiAdapterException):
@@ -0,0 +1,228 @@
+from datetime import datetime
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Deque, Tuple, Union, Optional
+
+from .codec import export
+from .message import MessageChain, MessageSegment
+from .event import (
+    MessageEvent,
+    GroupMessage,
+    GroupSyncMessage,
+    MessageQuote,
+    GroupRecallEvent,
+    FriendRecallEvent
+)
+
+
+RECORD_OVERHEAD = 400
+"""每条索引记录除消息链外的估算内存占用, 包括记录本身, 索引的键与队列中的引用"""
+
+
+def estimate_size(value: Any) -> int:
+    """
+    :说明:
+
+      粗略估算消息链或消息内容占用的内存字节数, 只用于索引的内存上限, 不追求精确
+    """
+    if isinstance(value, str):
+        return 50 + len(value)
+    if isinstance(value, MessageSegment):
+        return 48 + estimate_size(value.data)
+    if isinstance(value, dict):
+        return 100 + 16 * len(value) + sum(map(estimate_size, value.values()))
+    if isinstance(value, (list, tuple)):
+        return 56 + 8 * len(value) + sum(map(estimate_size, value))
+    return 32
+
+
+class IndexedMessage:
+    """
+    :说明:
+
+      索引中保存的一条消息, 只保留消息本身的内容, 不持有对应的事件
+
+    :属性:
+
+      * ``id: int``: 消息 id
+      * ``target: int``: 消息所在的群号, 私聊时为对方 qq
+      * ``time: datetime``: 消息发送时间
+      * ``type: str``: 对应事件的类型, 如 ``GroupMessage``
+      * ``sender: Any``: 发送者信息, 与对应事件的 ``sender`` 相同
+      * ``quote: Optional[MessageQuote]``: 消息所回复的消息
+      * ``message_chain: MessageChain``: 经过预处理后的消息链, 延迟解析的消息链在首次访问时解析
+      * ``size: int``: 估算的内存占用字节数
+    """
+    __slots__ = ('id', 'target', 'time', 'type', 'sender', 'quote', '_chain', 'size')
+
+    def __init__(self, id: int, target: int, time: datetime, event: MessageEvent):
+        self.id = id
+        self.target = target
+        self.time = time
+        self.type = event.type
+        self.sender = event.sender
+        self.quote = event.quote
+        raw = event.raw_message_chain
+        # 事件解析延迟的消息链时会修改原始数据, 因此复制一份
+        self._chain: Union[MessageChain, List[Dict[str, Any]]] = \
+            event.message_chain if raw is None else [dict(segment) for segment in raw]
+        self.size = RECORD_OVERHEAD + estimate_size(self._chain) \
+            + (estimate_size(self.quote.origin) if self.quote is not None else 0)
+
+    @property
+    def message_chain(self) -> MessageChain:
+        chain = self._chain
+        if not isinstance(chain, MessageChain):
+            chain = self._chain = MessageChain.from_raw(chain)
+        return chain
+
+    def export(self) -> Dict[str, Any]:
+        """
+        :说明:
+
+          导出为与 mirai-api-http ``messageFromId`` 返回的相同结构
+
+          消息链为预处理后的消息链, 开头依次补回 ``Source`` 与 ``Quote``,
+          预处理时移除的 @Bot 与去除的昵称不会还原
+        """
+        chain = self._chain
+        head: List[Dict[str, Any]] = [
+            {'type': 'Source', 'id': self.id, 'time': int(self.time.timestamp())}
+        ]
+        quote = self.quote
+        if quote is not None:
+            head.append({
+                'type': 'Quote',
+                'id': quote.id,
+                'senderId': quote.sender_id,
+                'targetId': quote.target_id,
+                'groupId': quote.group_id,
+                'origin': export(quote.origin),
+            })
+        return {
+            'type': self.type,
+            'sender': self.sender.dict(by_alias=True),
+            'messageChain': head + (export(chain) if isinstance(chain, MessageChain)
+                                    else [dict(segment) for segment in chain]),
+        }
+
+    def __repr__(self) -> str:
+        return f'<IndexedMessage {self.target}:{self.id}>'
+
+
+def message_target(event: MessageEvent) -> Optional[int]:
+    """获取消息事件的索引目标, 群消息为群号, 其余为对方 qq"""
+    if isinstance(event, GroupMessage):
+        return event.sender.group.id
+    if isinstance(event, GroupSyncMessage):
+        return event.sender.id
+    sender = getattr(event, 'sender', None) or getattr(event, 'subject', None)
+    return getattr(sender, 'id', None)
+
+
+class MessageIndex:
+    """
+    :说明:
+
+      单个 Bot 最近收到的消息索引, 按消息 id 在本地解析回复与撤回的消息
+
+      每个群/好友保留最近 ``target_size`` 条消息, 全部目标合计超过 ``size`` 条,
+      或估算的内存占用超过 ``max_bytes`` 时, 从最久没有新消息的目标开始淘汰;
+      只索引收到的消息, 不包含 Bot 发送的消息
+
+    :参数:
+
+      * ``size: int``: 索引的消息总数上限
+      * ``target_size: int``: 每个群/好友索引的消息数上限
+      * ``max_bytes: int``: 索引估算的内存占用上限, 为 0 时不限制
+    """
+
+    def __init__(self, size: int = 10000, target_size: int = 200, max_bytes: int = 0):
+        self.size = max(size, 1)
+        self.target_size = max(min(target_size, self.size), 1)
+        self.max_bytes = max(max_bytes, 0)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._targets: "OrderedDict[int, Deque[IndexedMessage]]" = OrderedDict()
+        self._messages: Dict[Tuple[int, int], IndexedMessage] = {}
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def stats(self) -> Dict[str, int]:
+        """导出索引统计"""
+        return {
+            'size': len(self._messages),
+            'targets': len(self._targets),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def add(self, event: MessageEvent) -> Optional[IndexedMessage]:
+        """将经过预处理的消息事件加入索引, 没有 ``source`` 的事件将被忽略"""
+        target = message_target(event)
+        if event.source is None or target is None:
+            return None
+        indexed = self._messages.get((target, event.source.id))
+        if indexed is not None:
+            return indexed
+        message = IndexedMessage(event.source.id, target, event.source.time, event)
+        messages = self._targets.get(target)
+        if messages is None:
+            messages = self._targets[target] = deque()
+        else:
+            self._targets.move_to_end(target)
+        if len(messages) >= self.target_size:
+            self._evict(messages)
+        messages.append(message)
+        self._messages[(target, message.id)] = message
+        self.bytes += message.size
+        while len(self._messages) > self.size \
+                or (self.max_bytes and self.bytes > self.max_bytes and self._messages):
+            oldest, messages = next(iter(self._targets.items()))
+            self._evict(messages)
+            if not messages:
+                del self._targets[oldest]
+        return message
+
+    def _evict(self, messages: Deque[IndexedMessage]) -> None:
+        message = messages.popleft()
+        del self._messages[(message.target, message.id)]
+        self.bytes -= message.size
+
+    def get(self, id: int, target: int) -> Optional[IndexedMessage]:
+        """
+        :说明:
+
+          按消息 id 查找消息
+
+        :参数:
+
+          * ``id: int``: 消息 id
+          * ``target: int``: 消息所在的群号, 私聊时为对方 qq
+        """
+        message = self._messages.get((target, id))
+        if message is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return message
+
+    def resolve_quote(self, quote: MessageQuote, self_id: Union[int, str]) -> Optional[IndexedMessage]:
+        """查找回复所引用的消息"""
+        if quote.group_id:
+            return self.get(quote.id, quote.group_id)
+        target = quote.target_id if str(quote.sender_id) == str(self_id) else quote.sender_id
+        return self.get(quote.id, target)
+
+    def resolve_recall(self, event: Union[GroupRecallEvent, FriendRecallEvent]) -> Optional[IndexedMessage]:
+        """查找被撤回的消息"""
+        if isinstance(event, GroupRecallEvent):
+            return self.get(event.message_id, event.group.id)
+        return self.get(event.message_id, event.operator)
+
+    def clear(self) -> None:
+        self._targets.clear()
+        self._messages.clear()
+        self.bytes = 0
@@ -0,0 +1,97 @@
+import time
+import sqlite3
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import IO, Dict, Tuple, Optional
+
+MediaKey = Tuple[str, str, str]
+"""``(sha256, 媒体种类, 上传类型)``, 媒体种类为 ``imageId`` 或 ``voiceId``"""
+
+
+def _hash_file(f: IO[bytes]) -> Optional[str]:
+    if not f.seekable():
+        return None
+    start = f.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1 << 16), b''):
+        digest.update(chunk)
+    f.seek(start)
+    return digest.hexdigest()
+
+
+async def hash_file(f: IO[bytes]) -> Optional[str]:
+    """在线程池中计算文件内容的 sha256, 文件不可回退读取时返回 ``None``"""
+    return await asyncio.get_running_loop().run_in_executor(None, _hash_file, f)
+
+
+class MediaCache:
+    """
+    :说明:
+
+      按内容哈希缓存上传得到的 imageId/voiceId, 相同内容再次发送时不再上传
+
+      缓存键为 ``(sha256, 媒体种类, 上传类型)``, 群图片与好友图片分别缓存;
+      超过 ``size`` 条时淘汰最久未使用的条目
+
+      指定 ``path`` 时同时保存到 sqlite 数据库, 重启后继续使用; 数据库中只记录写入时间,
+      重启后按写入顺序恢复淘汰顺序
+
+    :参数:
+
+      * ``size: int``: 缓存条目数量上限
+      * ``path: Optional[str]``: sqlite 数据库文件路径, 不填写时只缓存在内存中
+    """
+
+    def __init__(self, size: int = 10000, path: Optional[str] = None):
+        self.size = max(size, 1)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[MediaKey, str]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS media ('
+                'digest TEXT, kind TEXT, type TEXT, media_id TEXT, created REAL, '
+                'PRIMARY KEY (digest, kind, type))'
+            )
+            for digest, kind, type_, media_id in self._db.execute(
+                    'SELECT digest, kind, type, media_id FROM media ORDER BY created'):
+                self._entries[(digest, kind, type_)] = media_id
+            self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        """导出缓存统计"""
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def get(self, key: MediaKey) -> Optional[str]:
+        media_id = self._entries.get(key)
+        if media_id is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return media_id
+
+    def set(self, key: MediaKey, media_id: str) -> None:
+        self._entries[key] = media_id
+        self._entries.move_to_end(key)
+        if self._db is not None:
+            self._db.execute(
+                'INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?)',
+                (*key, media_id, time.time())
+            )
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.size:
+            key, _ = self._entries.popitem(last=False)
+            if self._db is not None:
+                self._db.execute(
+                    'DELETE FROM media WHERE digest = ? AND kind = ? AND type = ?', key)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -7,6 +7,8 @@ from nonebot.adapters import Message as BaseMessage
 from nonebot.adapters import MessageSegment as BaseMessageSegment
 from nonebot.typing import overrides
 
+from .upload import FileInput
+
 
 class MessageType(str, Enum):
     """消息类型枚举类"""
@@ -31,6 +33,11 @@ class MessageType(str, Enum):
     MIRAI_CODE = 'MiraiCode'
 
 
+_message_types: Dict[Any, MessageType] = {
+    **{t.value: t for t in MessageType}, **{t: t for t in MessageType}
+}
+
+
 class MessageSegment(BaseMessageSegment["MessageChain"]):
     """
     Mirai-API-HTTP 协议 MessageSegment 适配。具体方法参考 `mirai-api-http 消息类型`_
@@ -77,6 +84,23 @@ class MessageSegment(BaseMessageSegment["MessageChain"]):
             )
         return cls(**value)
 
+    @classmethod
+    def _new(cls, type: MessageType, data: Dict[str, Any]) -> "MessageSegment":
+        """跳过参数校验直接构造消息段, ``data`` 不会被复制"""
+        segment = cls.__new__(cls)
+        segment.type = type
+        segment.data = data
+        return segment
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> "MessageSegment":
+        """从 mirai-api-http 格式的消息段构造, 消息类型未知时回退到带校验的构造"""
+        type = _message_types.get(value.get('type'))
+        if type is None:
+            return cls(**value)
+        return cls._new(
+            type, {k: v for k, v in value.items() if k != 'type' and v is not None})
+
     @overrides(BaseMessageSegment)
     def is_text(self) -> bool:
         return self.type == MessageType.PLAIN
@@ -166,7 +190,8 @@ class MessageSegment(BaseMessageSegment["MessageChain"]):
               image_id: Optional[str] = None,
               url: Optional[str] = None,
               path: Optional[str] = None,
-              base64: Optional[str] = None):
+              base64: Optional[str] = None,
+              file: Optional[FileInput] = None):
         """
         :说明:
 
@@ -177,14 +202,17 @@ class MessageSegment(BaseMessageSegment["MessageChain"]):
           * ``image_id: Optional[str]``: 图片的image_id，群图片与好友图片格式不同。不为空时将忽略url属性
           * ``url: Optional[str]``: 图片的URL，发送时可作网络图片的链接
           * ``path: Optional[str]``: 图片的路径，发送本地图片
+          * ``file: Optional[FileInput]``: Bot 本地的文件路径, bytes, 文件对象或异步迭代器, 发送前通过 http 接口上传
         """
-        return cls(type=MessageType.IMAGE, imageId=image_id, url=url, path=path, base64=base64)
+        return cls(type=MessageType.IMAGE, imageId=image_id, url=url, path=path, base64=base64,
+                   file=file)
 
     @classmethod
     def flash_image(cls,
                     image_id: Optional[str] = None,
                     url: Optional[str] = None,
-                    path: Optional[str] = None):
+                    path: Optional[str] = None,
+                    file: Optional[FileInput] = None):
         """
         :说明:
 
@@ -197,13 +225,15 @@ class MessageSegment(BaseMessageSegment["MessageChain"]):
         return cls(type=MessageType.FLASH_IMAGE,
                    imageId=image_id,
                    url=url,
-                   path=path)
+                   path=path,
+                   file=file)
 
     @classmethod
     def voice(cls,
               voice_id: Optional[str] = None,
               url: Optional[str] = None,
-              path: Optional[str] = None):
+              path: Optional[str] = None,
+              file: Optional[FileInput] = None):
         """
         :说明:
 
@@ -214,11 +244,13 @@ class MessageSegment(BaseMessageSegment["MessageChain"]):
           * ``voice_id: Optional[str]``: 语音的voice_id，不为空时将忽略url属性
           * ``url: Optional[str]``: 语音的URL，发送时可作网络语音的链接
           * ``path: Optional[str]``: 语音的路径，发送本地语音
+          * ``file: Optional[FileInput]``: Bot 本地的语音文件, 发送前通过 http 接口上传
         """
         return cls(type=MessageType.VOICE,
-                   imageId=voice_id,
+                   voiceId=voice_id,
                    url=url,
-                   path=path)
+                   path=path,
+                   file=file)
 
     @classmethod
     def xml(cls, xml: str):
@@ -381,6 +413,9 @@ class MessageChain(BaseMessage[MessageSegment]):
     Mirai 协议 Message 适配
 
     由于Mirai协议的Message实现较为特殊, 故使用MessageChain命名
+
+    纯文本与按类型的消息段索引在首次查询时计算并缓存, 增删消息段时自动失效;
+    原地修改消息段的 ``data`` 后需调用 ``invalidate`` 使缓存失效
     """
 
     @classmethod
@@ -410,18 +445,159 @@ class MessageChain(BaseMessage[MessageSegment]):
     ) -> List[MessageSegment]:
         if isinstance(message, str):
             return [MessageSegment.plain(text=message)]
+        segment_class = self.get_segment_class()
         return [
             *map(
                 lambda x: x
-                if isinstance(x, MessageSegment) else MessageSegment(**x),
+                if isinstance(x, MessageSegment) else segment_class.from_dict(x),
                 message)
         ]
 
+    @staticmethod
+    def is_raw_known(message: List[Dict[str, Any]]) -> bool:
+        """消息链数据中的消息类型是否全部已知, 即 ``from_raw`` 不会回退到带校验的构造"""
+        return all(segment.get('type') in _message_types for segment in message)
+
+    @classmethod
+    def from_raw(cls, message: List[Dict[str, Any]]) -> "MessageChain":
+        """
+        :说明:
+
+          从解码后的 mirai-api-http 消息链快速构造, 不进行逐段校验
+
+          各消息段的 dict 会被直接作为 ``MessageSegment.data`` 使用 (移除 ``type`` 键), 只有需要去掉值为
+          ``None`` 的键时才复制; 调用后不应再使用传入的数据, 因此免校验的事件构造在其他字段全部构造成功后才调用此方法.
+          存在未知消息类型时不修改传入数据, 以原始数据回退到带校验的构造
+
+        :参数:
+
+          * ``message: List[Dict[str, Any]]``: 消息链数据
+        """
+        types = [_message_types.get(segment.get('type')) for segment in message]
+        if None in types:
+            return cls(message)
+        segment_class = cls.get_segment_class()
+        chain = cls.__new__(cls)
+        for type, data in zip(types, message):
+            del data['type']
+            if None in data.values():
+                data = {k: v for k, v in data.items() if v is not None}
+            list.append(chain, segment_class._new(type, data))
+        return chain
+
+    def invalidate(self) -> None:
+        """使纯文本与消息段索引的缓存失效"""
+        cache = self.__dict__
+        if cache:
+            cache.pop('_cached_text', None)
+            cache.pop('_cached_types', None)
+
+    def _type_index(self) -> Dict[MessageType, List[MessageSegment]]:
+        index = self.__dict__.get('_cached_types')
+        if index is None:
+            index = {}
+            for segment in self:
+                index.setdefault(segment.type, []).append(segment)
+            self.__dict__['_cached_types'] = index
+        return index
+
+    def _segments_of(self, type: Union[MessageType, str]) -> List[MessageSegment]:
+        return self._type_index().get(_message_types.get(type), [])  # type: ignore
+
+    def has(self, type: Union[MessageType, str]) -> bool:
+        """
+        :说明:
+
+          消息链中是否包含指定类型的消息段
+
+        :参数:
+
+          * ``type: Union[MessageType, str]``: 消息类型
+        """
+        return bool(self._segments_of(type))
+
+    @overrides(BaseMessage)
+    def extract_plain_text(self) -> str:
+        text = self.__dict__.get('_cached_text')
+        if text is None:
+            text = self.__dict__['_cached_text'] = ''.join(
+                str(segment) for segment in self._segments_of(MessageType.PLAIN))
+        return text
+
+    @overrides(BaseMessage)
+    def __getitem__(self, args):
+        if isinstance(args, str):
+            return self.__class__(self._segments_of(args))
+        if isinstance(args, tuple) and len(args) == 2 and isinstance(args[0], str) \
+                and isinstance(args[1], (int, slice)):
+            segments = self._segments_of(args[0])[args[1]]
+            return segments if isinstance(args[1], int) else self.__class__(segments)
+        return super().__getitem__(args)
+
+    @overrides(BaseMessage)
+    def index(self, value, *args) -> int:
+        if isinstance(value, str) and not args:
+            segments = self._segments_of(value)
+            if not segments:
+                raise ValueError(f"Segment with type {value} is not in message")
+            return super().index(segments[0])
+        return super().index(value, *args)
+
+    @overrides(BaseMessage)
+    def get(self, type_: str, count: Optional[int] = None) -> "MessageChain":
+        segments = self._segments_of(type_)
+        return self.__class__(segments if count is None else segments[:count])
+
+    @overrides(BaseMessage)
+    def count(self, value) -> int:
+        if isinstance(value, str):
+            return len(self._segments_of(value))
+        return super().count(value)
+
+    @overrides(BaseMessage)
+    def append(self, obj: Union[str, MessageSegment]) -> "MessageChain":
+        self.invalidate()
+        return super().append(obj)
+
+    def insert(self, index, obj) -> None:
+        self.invalidate()
+        super().insert(index, obj)
+
+    def pop(self, *args):
+        self.invalidate()
+        return super().pop(*args)
+
+    def remove(self, value) -> None:
+        self.invalidate()
+        super().remove(value)
+
+    def clear(self) -> None:
+        self.invalidate()
+        super().clear()
+
+    def reverse(self) -> None:
+        self.invalidate()
+        super().reverse()
+
+    def sort(self, *args, **kwargs) -> None:
+        self.invalidate()
+        super().sort(*args, **kwargs)
+
+    def __setitem__(self, index, value) -> None:
+        self.invalidate()
+        super().__setitem__(index, value)
+
+    def __delitem__(self, index) -> None:
+        self.invalidate()
+        super().__delitem__(index)
+
+    def __imul__(self, other):
+        self.invalidate()
+        return super().__imul__(other)
+
     def export(self) -> List[Dict[str, Any]]:
         """导出为可以被正常json序列化的数组"""
-        return [
-            *map(lambda segment: segment.as_dict(), self.copy())  # type: ignore
-        ]
+        return [segment.as_dict() for segment in self]
 
     def extract_first(self, *type: MessageType) -> Optional[MessageSegment]:
         """
@@ -0,0 +1,163 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple, Union, Callable, Iterable
+
+Labels = Tuple[Tuple[str, str], ...]
+Listener = Callable[[str, str, float, Dict[str, str]], Any]
+Collector = Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]
+
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+class Histogram:
+    """
+    :说明:
+
+      固定分桶的直方图, 记录观测值的分布, 总和与数量
+
+    :参数:
+
+      * ``buckets: Tuple[float, ...]``: 递增的分桶上界, 单位为秒
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """按分桶估算分位数, 返回所在分桶的上界"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Union[Labels, Iterable[Tuple[str, Any]]], **extra: Any) -> str:
+    items = [*labels, *extra.items()]
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+class Metrics:
+    """
+    :说明:
+
+      适配器的运行指标, 包括各处理阶段与 api 调用耗时的直方图以及计数器
+
+      未开启 ``mirai_metrics`` 时适配器不会创建此对象, 热路径上只有一次 ``None`` 判断
+
+    :导出:
+
+      * ``render``: 生成 Prometheus 文本格式
+      * ``add_listener``: 每次记录指标时调用回调, 可用于推送到其他监控系统
+      * ``add_collector``: 导出时调用回调获取当前的状态值 (gauge)
+    """
+
+    def __init__(self, prefix: str = 'mirai2', buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self._listeners: List[Listener] = []
+        self._collectors: List[Collector] = []
+
+    def add_listener(self, listener: Listener) -> None:
+        """
+        :说明:
+
+          添加指标回调, 参数依次为 ``kind`` (``histogram`` 或 ``counter``), 指标名, 数值与标签
+        """
+        self._listeners.append(listener)
+
+    def add_collector(self, collector: Collector) -> None:
+        """
+        :说明:
+
+          添加状态收集函数, 导出时调用, 返回 ``(指标名, 标签, 数值)`` 的迭代器
+        """
+        self._collectors.append(collector)
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """记录一次耗时, 单位为秒"""
+        key = tuple((k, str(v)) for k, v in labels.items())
+        series = self.histograms.setdefault(name, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets)
+        histogram.observe(value)
+        for listener in self._listeners:
+            listener('histogram', name, value, dict(key))
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """计数器增加 ``value``"""
+        key = tuple((k, str(v)) for k, v in labels.items())
+        series = self.counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + value
+        for listener in self._listeners:
+            listener('counter', name, value, dict(key))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """导出可以被正常json序列化的指标快照"""
+        return {
+            'histograms': {
+                name: [
+                    {'labels': dict(key), 'count': h.count, 'sum': h.sum,
+                     'p50': h.quantile(0.5), 'p99': h.quantile(0.99)}
+                    for key, h in series.items()
+                ] for name, series in self.histograms.items()
+            },
+            'counters': {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in self.counters.items()
+            },
+        }
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式的指标"""
+        lines: List[str] = []
+        for name, series in self.histograms.items():
+            metric = f'{self.prefix}_{name}_seconds'
+            lines.append(f'# TYPE {metric} histogram')
+            for key, h in series.items():
+                total = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    total += count
+                    lines.append(f'{metric}_bucket{_format_labels(key, le=bound)} {total}')
+                lines.append(f'{metric}_bucket{_format_labels(key, le="+Inf")} {h.count}')
+                lines.append(f'{metric}_sum{_format_labels(key)} {h.sum}')
+                lines.append(f'{metric}_count{_format_labels(key)} {h.count}')
+        for name, series in self.counters.items():
+            metric = f'{self.prefix}_{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            for key, value in series.items():
+                lines.append(f'{metric}{_format_labels(key)} {value}')
+        gauges: Dict[str, List[str]] = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                if value is None:
+                    continue
+                gauges.setdefault(name, []).append(
+                    f'{self.prefix}_{name}{_format_labels(labels.items())} {value}')
+        for name, samples in gauges.items():
+            lines.append(f'# TYPE {self.prefix}_{name} gauge')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,225 @@
+import re
+import asyncio
+import contextlib
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple, Optional
+
+from nonebot.drivers import URL, Request, Response
+
+from .exception import NetworkError
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+if TYPE_CHECKING:
+    from .adapter import Adapter
+
+_GET_COMMANDS = {
+    'about', 'botList', 'messageFromId', 'friendList', 'groupList', 'memberList',
+    'latestMemberList', 'botProfile', 'friendProfile', 'memberProfile', 'userProfile',
+    'countMessage', 'fetchMessage', 'fetchLatestMessage', 'peekMessage', 'peekLatestMessage',
+    'file/list', 'file/info', 'anno/list',
+}
+_POST_COMMANDS = {
+    'sendFriendMessage', 'sendGroupMessage', 'sendTempMessage', 'sendOtherClientMessage',
+    'sendNudge', 'recall', 'roamingMessages', 'deleteFriend', 'mute', 'unmute', 'kick', 'quit',
+    'muteAll', 'unmuteAll', 'setEssence', 'memberAdmin', 'file/mkdir', 'file/delete',
+    'file/move', 'file/rename', 'anno/publish', 'anno/delete', 'resp/newFriendRequestEvent',
+    'resp/memberJoinRequestEvent', 'resp/botInvitedJoinGroupRequestEvent',
+    'cmd/execute', 'cmd/register',
+}
+_SUBCOMMANDS = {'memberInfo', 'groupConfig'}
+_PATHS = {
+    re.sub('[_/]', '', path).lower(): path
+    for path in (*_GET_COMMANDS, *_POST_COMMANDS, *_SUBCOMMANDS)
+}
+
+
+def http_route(api: str, subcommand: Optional[str] = None) -> Tuple[str, str]:
+    """
+    :说明:
+
+      获取 websocket 命令对应的 http 请求方法与路径, 如 ``file_list`` 对应 ``GET file/list``
+
+      带有 ``get`` / ``update`` 子命令的命令分别对应 ``GET`` 与 ``POST``, 未知的命令按 ``POST`` 发送
+    """
+    path = _PATHS.get(re.sub('[_/]', '', api).lower(), api)
+    if path in _SUBCOMMANDS:
+        return ('POST' if subcommand == 'update' else 'GET'), path
+    return ('GET' if path in _GET_COMMANDS else 'POST'), path
+
+
+class PollSchedule:
+    """
+    :说明:
+
+      自适应的轮询批量与间隔
+
+      取满一批时批量翻倍并立即再次轮询; 取到部分事件时以最短间隔轮询;
+      没有事件时批量减半, 间隔从最短间隔开始翻倍直至 ``interval``
+
+    :参数:
+
+      * ``interval: float``: 空闲时轮询间隔的上限, 单位为秒
+      * ``min_count: int``: 每次获取事件数量的下限
+      * ``max_count: int``: 每次获取事件数量的上限
+    """
+
+    def __init__(self, interval: float = 1.0, min_count: int = 10, max_count: int = 200):
+        self.interval = interval
+        self.min_interval = interval / 16
+        self.min_count = max(min_count, 1)
+        self.max_count = max(max_count, self.min_count)
+        self.count = self.min_count
+        self.delay = 0.0
+
+    def update(self, received: int) -> float:
+        """根据本次获取的事件数量调整批量, 返回下次轮询前的等待时间"""
+        if received >= self.count:
+            self.count = min(self.count * 2, self.max_count)
+            self.delay = 0.0
+        elif received:
+            self.delay = self.min_interval
+        else:
+            self.count = max(self.count // 2, self.min_count)
+            self.delay = min(max(self.delay * 2, self.min_interval), self.interval)
+        return self.delay
+
+
+class HTTPClient:
+    """
+    :说明:
+
+      mirai-api-http http 接口的客户端
+
+      安装了 ``httpx`` 时复用同一个连接池, 否则通过驱动器发送, 每个请求单独建立连接
+
+    :参数:
+
+      * ``adapter: Adapter``: 没有安装 ``httpx`` 时用于发送请求的适配器
+      * ``pool_size: int``: 连接池的连接数量上限
+    """
+
+    def __init__(self, adapter: "Adapter", pool_size: int = 10):
+        self.adapter = adapter
+        self._client = None
+        if httpx is not None:
+            self._client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size))
+
+    async def request(self, request: Request) -> Response:
+        if self._client is None:
+            return await self.adapter.request(request)
+        try:
+            response = await self._client.request(
+                request.method,
+                str(request.url),
+                content=request.content,  # type: ignore
+                data=request.data,  # type: ignore
+                json=request.json,
+                files=request.files,  # type: ignore
+                headers=tuple(request.headers.items()),
+                timeout=request.timeout,
+            )
+        except httpx.HTTPError as e:
+            raise NetworkError(f'{request.method} {request.url} failed: {e!r}') from e
+        return Response(
+            response.status_code,
+            headers=response.headers.multi_items(),
+            content=response.content,
+            request=request,
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+
+class PollingConnection:
+    """
+    :说明:
+
+      http 轮询模式下单个 Bot 的连接, 通过 ``verify`` 与 ``bind`` 建立会话,
+      以 ``fetchMessage`` 批量获取事件, 并以 http 请求发送 api 命令
+
+      在适配器中代替 websocket 保存于 ``connections``, ``close`` 后轮询结束
+
+    :参数:
+
+      * ``adapter: Adapter``: 所属的适配器
+      * ``qq: str``: Bot 账号
+    """
+
+    def __init__(self, adapter: "Adapter", qq: str):
+        self.adapter = adapter
+        self.qq = qq
+        self.session: Optional[str] = None
+        self._closed = asyncio.Event()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    async def call(self, method: str, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """发送 http 请求, 返回解码后的响应; 已建立会话时自动附带 ``sessionKey``"""
+        adapter = self.adapter
+        if self.session is not None:
+            data = {'sessionKey': self.session, **data}
+        url: URL = adapter._http_url(endpoint)
+        if method == 'GET':
+            request = Request(method, url, params={
+                k: (str(v).lower() if isinstance(v, bool) else v)
+                for k, v in data.items() if v is not None
+            }, timeout=adapter.config.api_timeout)
+        else:
+            request = Request(
+                method, url, content=adapter.codec.dumps(data),
+                headers={'Content-Type': 'application/json'},
+                timeout=adapter.config.api_timeout
+            )
+        response = await adapter.http_client.request(request)
+        if response.status_code != 200 or not response.content:
+            raise NetworkError(
+                f'{adapter.get_name()} | {method} {endpoint} failed with HTTP {response.status_code}')
+        return adapter._decode(self.qq, response.content)
+
+    async def open(self) -> None:
+        """验证并绑定会话, 失败时抛出 ``NetworkError``"""
+        result = await self.call('POST', 'verify', {'verifyKey': self.adapter.mirai_config.verify_key})
+        if result.get('code'):
+            raise NetworkError(f'verify failed: {result}')
+        session = result['session']
+        result = await self.call('POST', 'bind', {'sessionKey': session, 'qq': int(self.qq)})
+        if result.get('code'):
+            raise NetworkError(f'bind failed: {result}')
+        self.session = session
+
+    async def command(self, api: str, subcommand: Optional[str],
+                      data: Dict[str, Any]) -> Dict[str, Any]:
+        """发送 api 命令, 返回与 websocket 响应相同格式的数据"""
+        method, endpoint = http_route(api, subcommand)
+        return {'syncId': '', 'data': await self.call(method, endpoint, data)}
+
+    async def fetch(self, count: int) -> List[Dict[str, Any]]:
+        """获取至多 ``count`` 个事件, 会话失效时抛出 ``NetworkError``"""
+        result = await self.call('GET', 'fetchMessage', {'count': count})
+        if result.get('code'):
+            raise NetworkError(f'fetchMessage failed: {result}')
+        return result.get('data') or []
+
+    async def wait(self, delay: float) -> None:
+        """等待 ``delay`` 秒, 连接关闭时提前返回"""
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._closed.wait(), delay)
+
+    async def close(self, *args: Any, **kwargs: Any) -> None:
+        self._closed.set()
+
+    async def release(self) -> None:
+        """释放会话, 忽略失败"""
+        if self.session is None:
+            return
+        with contextlib.suppress(Exception):
+            await self.call('POST', 'release', {'qq': int(self.qq)})
+        self.session = None
@@ -0,0 +1,252 @@
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Type, Tuple, Union, Optional
+
+from nonebot.message import handle_event
+
+from . import log
+from .event import Event, GroupMessage, MessageEvent, MessageSource, MessageQuote
+from .message import MessageSegment, MessageType, _message_types
+
+if TYPE_CHECKING:
+    from .bot import Bot
+
+
+class RawSegment:
+    """
+    :说明:
+
+      延迟解析的消息链在预处理时使用的消息段视图
+
+      ``data`` 为 mirai-api-http 推送的原始数据 (包含 ``type`` 键), 修改会反映到之后解析出的消息链
+    """
+    __slots__ = ('type', 'data')
+
+    def __init__(self, data: Dict[str, Any]):
+        self.type = _message_types.get(data.get('type'), data.get('type'))
+        self.data = data
+
+    def __str__(self) -> str:
+        return self.data.get('text', "") if self.type == MessageType.PLAIN else repr(self)
+
+    def __repr__(self) -> str:
+        return f'<RawSegment {self.data!r}>'
+
+
+Segment = Union[MessageSegment, RawSegment]
+
+
+class PreprocessContext:
+    """
+    :说明:
+
+      一次预处理的上下文, ``state`` 供各阶段保存本次处理的中间状态
+    """
+    __slots__ = ('bot', 'event', 'state')
+
+    def __init__(self, bot: "Bot", event: MessageEvent):
+        self.bot = bot
+        self.event = event
+        self.state: Dict[str, Any] = {}
+
+    def is_empty(self) -> bool:
+        """消息链是否为空, 不会触发延迟解析"""
+        raw = self.event.raw_message_chain
+        return not (raw if raw is not None else self.event.message_chain)
+
+    def append(self, segment: MessageSegment) -> None:
+        """向消息链末尾添加消息段, 不会触发延迟解析"""
+        raw = self.event.raw_message_chain
+        if raw is not None:
+            raw.append(segment.as_dict())
+        else:
+            self.event.message_chain.append(segment)
+
+
+class PreprocessStage:
+    """
+    :说明:
+
+      消息预处理阶段基类
+
+      预处理只遍历一次消息链, 每个消息段依次经过各阶段的 ``process``;
+      ``index`` 为此前已到达本阶段的消息段数量, 前面阶段移除的消息段不计入
+
+      消息链尚未解析时 ``segment`` 为 ``RawSegment``, 阶段应只使用 ``type``, ``data`` 与 ``str()``,
+      并通过 ``ctx.is_empty`` / ``ctx.append`` 访问消息链, 以免触发解析
+
+    :属性:
+
+      * ``name: str``: 阶段名称, 用于注册时定位
+      * ``event_types: Tuple[Type[MessageEvent], ...]``: 本阶段处理的事件类型
+      * ``head_only: bool``: 是否只处理到达本阶段的第一个消息段
+    """
+    name: str = ''
+    event_types: Tuple[Type[MessageEvent], ...] = (MessageEvent,)
+    head_only: bool = False
+
+    def process(self, ctx: PreprocessContext, segment: Segment, index: int) -> bool:
+        """处理一个消息段, 返回 ``False`` 时将其从消息链中移除且不再经过后续阶段"""
+        return True
+
+    def finish(self, ctx: PreprocessContext) -> None:
+        """消息链遍历结束后调用"""
+        pass
+
+
+class SourceStage(PreprocessStage):
+    """提取消息链开头的 ``Source`` 至 ``event.source``"""
+    name = 'source'
+    head_only = True
+
+    def process(self, ctx: PreprocessContext, segment: Segment, index: int) -> bool:
+        if segment.type != MessageType.SOURCE:
+            return True
+        ctx.event.source = MessageSource.parse_obj(segment.data)
+        return False
+
+
+class QuoteStage(PreprocessStage):
+    """提取 ``Source`` 之后的 ``Quote`` 至 ``event.quote``, 回复 Bot 的消息视为 to_me"""
+    name = 'quote'
+    head_only = True
+
+    def process(self, ctx: PreprocessContext, segment: Segment, index: int) -> bool:
+        if segment.type != MessageType.QUOTE:
+            return True
+        event = ctx.event
+        event.quote = MessageQuote.parse_obj(segment.data)
+        if segment.data['senderId'] == event.self_id:
+            event.to_me = True
+        return False
+
+
+class NicknameStage(PreprocessStage):
+    """去除群消息开头纯文本中的 Bot 昵称, 并视为 to_me"""
+    name = 'nickname'
+    event_types = (GroupMessage,)
+    head_only = True
+
+    def process(self, ctx: PreprocessContext, segment: Segment, index: int) -> bool:
+        bot = ctx.bot
+        if segment.type != MessageType.PLAIN or not len(bot.config.nickname):
+            return True
+        text = str(segment)
+        matched = bot.adapter.nickname_matcher.match(text)
+        if matched is not None:
+            ctx.event.to_me = True
+            nickname, end = matched
+            log.info(f'User is calling me {nickname}')
+            segment.data['text'] = text[end:]
+        return True
+
+
+class AtStage(PreprocessStage):
+    """移除群消息中第一个 @Bot 的消息段, 并视为 to_me"""
+    name = 'at'
+    event_types = (GroupMessage,)
+
+    def process(self, ctx: PreprocessContext, segment: Segment, index: int) -> bool:
+        if 'at' in ctx.state or segment.type != MessageType.AT \
+                or segment.data.get('target', '') != ctx.event.self_id:
+            return True
+        ctx.state['at'] = True
+        ctx.event.to_me = True
+        return False
+
+    def finish(self, ctx: PreprocessContext) -> None:
+        if ctx.is_empty():
+            ctx.append(MessageSegment.plain(""))
+
+
+class PreprocessPipeline:
+    """
+    :说明:
+
+      单次遍历的消息预处理流水线
+
+    :参数:
+
+      * ``stages: List[PreprocessStage]``: 按顺序执行的预处理阶段
+    """
+
+    def __init__(self, stages: List[PreprocessStage]):
+        self.stages = list(stages)
+
+    def register(self, stage: PreprocessStage, before: Optional[str] = None) -> None:
+        """
+        :说明:
+
+          注册一个预处理阶段
+
+        :参数:
+
+          * ``stage: PreprocessStage``: 预处理阶段
+          * ``before: Optional[str]``: 插入到该名称的阶段之前, 不填写时追加到末尾
+        """
+        for index, registered in enumerate(self.stages):
+            if before is not None and registered.name == before:
+                self.stages.insert(index, stage)
+                return
+        if before is not None:
+            raise ValueError(f'Preprocess stage {before!r} not found')
+        self.stages.append(stage)
+
+    def unregister(self, name: str) -> None:
+        """移除指定名称的预处理阶段"""
+        self.stages = [stage for stage in self.stages if stage.name != name]
+
+    def run(self, bot: "Bot", event: MessageEvent) -> None:
+        """遍历一次消息链, 依次执行适用于该事件的各阶段"""
+        stages = [stage for stage in self.stages if isinstance(event, stage.event_types)]
+        if not stages:
+            return
+        ctx = PreprocessContext(bot, event)
+        counts = [0] * len(stages)
+        raw = event.raw_message_chain
+        chain: List[Any] = raw if raw is not None else event.message_chain
+        segments: List[Segment] = list(map(RawSegment, chain)) if raw is not None else chain
+        kept: List[Segment] = []
+        for segment in segments:
+            for i, stage in enumerate(stages):
+                index = counts[i]
+                counts[i] += 1
+                if stage.head_only and index:
+                    continue
+                if not stage.process(ctx, segment, index):
+                    break
+            else:
+                kept.append(segment)
+        if raw is not None:
+            if len(kept) != len(chain):
+                chain[:] = [segment.data for segment in kept]
+        else:
+            if len(kept) != len(chain):
+                chain[:] = kept
+            chain.invalidate()
+        for stage in stages:
+            stage.finish(ctx)
+
+
+pipeline = PreprocessPipeline([SourceStage(), QuoteStage(), NicknameStage(), AtStage()])
+"""默认的消息预处理流水线, 插件可通过 ``pipeline.register`` 添加自定义阶段"""
+
+
+async def process_event(bot: "Bot", event: Event) -> None:
+    metrics = bot.adapter.metrics
+    if metrics is not None:
+        start = time.perf_counter()
+    if isinstance(event, MessageEvent):
+        pipeline.run(bot, event)
+        index = bot.adapter.message_indexes.get(bot.self_id)
+        if index is not None:
+            index.add(event)
+    if metrics is None:
+        await handle_event(bot, event)
+        return
+    handle_start = time.perf_counter()
+    metrics.observe('preprocess', handle_start - start, bot=bot.self_id, type=event.type)
+    try:
+        await handle_event(bot, event)
+    finally:
+        metrics.observe('handle_event', time.perf_counter() - handle_start,
+                        bot=bot.self_id, type=event.type)
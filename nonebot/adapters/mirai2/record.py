@@ -0,0 +1,103 @@
+import io
+import gzip
+import zlib
+import time
+import asyncio
+from typing import IO, Any, Dict, Iterator, NamedTuple, Optional
+
+from .codec import JSONCodec, get_codec
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+class RecordedFrame(NamedTuple):
+    """录制的一个事件, ``time`` 为收到时的 unix 时间戳"""
+    time: float
+    qq: str
+    data: Dict[str, Any]
+
+
+class TrafficRecorder:
+    """
+    :说明:
+
+      将 mirai-api-http 推送的原始事件追加写入文件, 用于之后通过 ``replay`` 回放
+
+      每行为 ``时间戳<TAB>qq<TAB>事件 json``, 只记录推送的事件, 不记录 api 响应;
+      开启压缩时每次打开文件追加一个新的 gzip 段, 读取时自动拼接
+
+      写入经过缓冲, 首次记录后由后台任务每隔 ``flush_interval`` 秒刷新到文件一次,
+      之后没有新事件时缓冲中的事件也会及时写入
+
+    :参数:
+
+      * ``path: str``: 录制文件路径
+      * ``compress: bool``: 是否以 gzip 压缩
+      * ``codec: Optional[JSONCodec]``: 编码事件使用的 JSON 编解码器
+      * ``flush_interval: float``: 刷新到文件的间隔, 单位为秒
+    """
+
+    def __init__(self, path: str, compress: bool = False,
+                 codec: Optional[JSONCodec] = None, flush_interval: float = 1.0):
+        self.path = path
+        self.codec = codec or get_codec()
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._file: Optional[IO[str]]
+        if compress:
+            self._file = io.TextIOWrapper(gzip.open(path, 'ab', compresslevel=6), encoding='utf-8')
+        else:
+            self._file = open(path, 'a', encoding='utf-8', buffering=1 << 16)
+        self._task: Optional["asyncio.Task"] = None
+
+    def record(self, qq: str, data: Dict[str, Any]) -> None:
+        """记录一个事件, 在事件数据被修改前调用"""
+        if self._file is None:
+            return
+        self._file.write(f'{time.time():.3f}\t{qq}\t{self.codec.dumps(data)}\n')
+        self.count += 1
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        while self._file is not None:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_records(path: str, codec: Optional[JSONCodec] = None) -> Iterator[RecordedFrame]:
+    """
+    :说明:
+
+      逐条读取录制文件, 自动识别是否为 gzip 压缩; 进程异常退出时未完整写入的末尾将被忽略
+
+    :参数:
+
+      * ``path: str``: 录制文件路径
+      * ``codec: Optional[JSONCodec]``: 解码事件使用的 JSON 编解码器
+    """
+    codec = codec or get_codec()
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == _GZIP_MAGIC
+    opener = gzip.open if compressed else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                if not line.endswith('\n'):
+                    return
+                timestamp, qq, frame = line.rstrip('\n').split('\t', 2)
+                yield RecordedFrame(float(timestamp), qq, codec.loads(frame))
+        except (EOFError, zlib.error):
+            return
@@ -0,0 +1,186 @@
+"""
+回放 ``mirai_record_path`` 录制的事件, 按原速, 倍速或最大速度重新构造事件并交给插件处理,
+统计吞吐量与处理延迟, 用于在本地复现高峰期的负载
+
+    python -m nonebot.adapters.mirai2.replay traffic.log --speed 10 --plugin-dir src/plugins
+
+回放时读取当前目录的 nonebot 配置, 不会再次录制; api 请求不会发送到 mirai-api-http,
+直接返回成功的响应, 可通过 ``--api-latency`` 模拟 api 的耗时
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from itertools import islice
+from typing import Any, Dict, List, Iterable, Optional
+
+from .bot import Bot
+from .event import Event
+from .adapter import Adapter
+from .preprocess import process_event
+from .record import RecordedFrame, read_records
+
+
+class ReplayAdapter(Adapter):
+    """
+    :说明:
+
+      回放使用的适配器, api 请求经过限速, 缓存与上传等处理后不发送, 直接返回成功的响应
+    """
+    api_latency: float = 0.0
+
+    async def _send_command(self, bot: Bot, api: str, subcommand: Optional[str],
+                            data: Dict[str, Any]) -> Dict[str, Any]:
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        return {'syncId': '', 'data': {'code': 0, 'msg': '', 'messageId': -1, 'data': []}}
+
+
+class ReplayStats:
+    """
+    :说明:
+
+      回放统计
+
+      * ``latency``: 事件从开始回放到处理完成的时间
+      * ``lag``: 事件开始处理的时间比录制时间线延后的时间, 回放跟不上指定速度时增大
+    """
+
+    def __init__(self):
+        self.events = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.latencies: List[float] = []
+        self.max_lag = 0.0
+
+    @staticmethod
+    def _percentile(values: List[float], q: float) -> float:
+        if not values:
+            return 0.0
+        return values[min(int(q * len(values)), len(values) - 1)]
+
+    def as_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            'events': self.events,
+            'errors': self.errors,
+            'elapsed': round(self.elapsed, 3),
+            'events_per_sec': round(self.events / self.elapsed, 1) if self.elapsed else 0.0,
+            'latency_p50_ms': round(self._percentile(latencies, 0.5) * 1000, 3),
+            'latency_p99_ms': round(self._percentile(latencies, 0.99) * 1000, 3),
+            'latency_max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            'max_lag_ms': round(self.max_lag * 1000, 3),
+        }
+
+
+async def replay(adapter: Adapter, records: Iterable[RecordedFrame],
+                 speed: Optional[float] = 1.0, concurrency: int = 1000) -> ReplayStats:
+    """
+    :说明:
+
+      按录制的时间间隔回放事件, 每个事件经过 ``Event.new`` 与 ``process_event`` 处理
+
+    :参数:
+
+      * ``adapter: Adapter``: 处理事件的适配器, 使用其事件解析相关的配置
+      * ``records: Iterable[RecordedFrame]``: 录制的事件, 通常来自 ``read_records``
+      * ``speed: Optional[float]``: 回放速度倍率, ``1`` 为原速, ``None`` 为不等待尽快回放
+      * ``concurrency: int``: 同时处理的事件数量上限
+    """
+    config = adapter.mirai_config
+    stats = ReplayStats()
+    bots: Dict[str, Bot] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def handle(bot: Bot, data: Dict[str, Any], start: float) -> None:
+        try:
+            event = Event.new(data, trusted=config.mirai_trusted_decode,
+                              lazy=config.mirai_lazy_message)
+            await process_event(bot, event)
+        except Exception:
+            stats.errors += 1
+        else:
+            stats.latencies.append(time.perf_counter() - start)
+        finally:
+            stats.events += 1
+            semaphore.release()
+
+    first: Optional[float] = None
+    start = time.perf_counter()
+    for record in records:
+        if first is None:
+            first = record.time
+        if speed:
+            scheduled = start + (record.time - first) / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await semaphore.acquire()
+        if speed:
+            stats.max_lag = max(stats.max_lag, time.perf_counter() - scheduled)
+        bot = bots.get(record.qq)
+        if bot is None:
+            bot = bots[record.qq] = Bot(adapter, record.qq)
+            adapter.bot_connect(bot)
+        record.data['self_id'] = record.qq
+        task = asyncio.create_task(handle(bot, record.data, time.perf_counter()))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(tasks)
+    stats.elapsed = time.perf_counter() - start
+    for bot in bots.values():
+        adapter.bot_disconnect(bot)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='replay recorded mirai2 traffic')
+    parser.add_argument('path', help='file written by mirai_record_path')
+    speed = parser.add_mutually_exclusive_group()
+    speed.add_argument('--speed', type=float, default=1.0, help='playback speed multiplier')
+    speed.add_argument('--max', action='store_true', help='replay as fast as possible')
+    parser.add_argument('--limit', type=int, default=None, help='replay at most this many events')
+    parser.add_argument('--concurrency', type=int, default=1000,
+                        help='events being handled at the same time')
+    parser.add_argument('--api-latency', type=float, default=0.0,
+                        help='simulated api response delay in seconds')
+    parser.add_argument('--plugin', action='append', default=[], help='plugin module to load')
+    parser.add_argument('--plugin-dir', action='append', default=[], help='plugin directory to load')
+    parser.add_argument('--json', action='store_true', help='print results as json')
+    args = parser.parse_args(argv)
+
+    import nonebot
+
+    nonebot.init(driver='~fastapi', mirai_forward=False, mirai_record_path=None)
+    driver = nonebot.get_driver()
+    driver.register_adapter(ReplayAdapter)
+    adapter: ReplayAdapter = driver._adapters[ReplayAdapter.get_name()]  # type: ignore
+    adapter.api_latency = args.api_latency
+    for plugin in args.plugin:
+        nonebot.load_plugin(plugin)
+    if args.plugin_dir:
+        nonebot.load_plugins(*args.plugin_dir)
+
+    async def run() -> ReplayStats:
+        await driver.server_app.router.startup()
+        try:
+            records = islice(read_records(args.path, adapter.codec), args.limit)
+            return await replay(adapter, records, None if args.max else args.speed,
+                                args.concurrency)
+        finally:
+            await driver.server_app.router.shutdown()
+
+    result = asyncio.run(run()).as_dict()
+    if args.json:
+        print(json.dumps(result))
+    else:
+        for key, value in result.items():
+            print(f'{key:<16} {value}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import asyncio
+import contextlib
+from typing import Any, Dict
+
+from nonebot.drivers import WebSocket
+
+from . import log
+
+
+class RelayFailed(Exception):
+    """代分片进程调用的 api 返回了错误, ``response`` 为 mirai-api-http 的原始响应"""
+
+    def __init__(self, response: Dict[str, Any]):
+        super().__init__(response)
+        self.response = response
+
+
+def shard_key(data: Dict[str, Any]) -> str:
+    """
+    :说明:
+
+      从未解析的事件数据中取出会话标识, 同一群成员或同一好友的事件得到相同的标识,
+      用于将同一会话的事件分配到同一个分片
+    """
+    sender = data.get('sender') or data.get('member') or data.get('friend') or {}
+    group = sender.get('group') or data.get('group') or {}
+    return f"{group.get('id')}_{sender.get('id')}"
+
+
+class ShardLink:
+    """
+    :说明:
+
+      主进程到一个分片进程的连接
+
+      待发送的数据帧按顺序写入, 保证同一分片收到的事件顺序与接收顺序一致
+
+    :参数:
+
+      * ``websocket: WebSocket``: 分片进程的 websocket 连接
+      * ``queue_size: int``: 待发送数据帧的数量上限, 超出时丢弃新的数据帧
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int = 10000):
+        self.websocket = websocket
+        self.dropped = 0
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue(queue_size)
+        self._task = asyncio.create_task(self._writer())
+
+    def send(self, frame: str) -> None:
+        """将数据帧加入发送队列"""
+        try:
+            self._queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            log.warning('Shard send queue is full, frame dropped')
+
+    async def _writer(self) -> None:
+        while True:
+            frame = await self._queue.get()
+            try:
+                await self.websocket.send(frame)
+            except Exception as e:
+                log.warning('Failed to send frame to shard, closing link', e)
+                with contextlib.suppress(Exception):
+                    await self.websocket.close()
+                return
+
+    def close(self) -> None:
+        self._task.cancel()
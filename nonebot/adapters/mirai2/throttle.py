@@ -0,0 +1,234 @@
+import asyncio
+import time
+import contextvars
+from collections import deque
+from typing import Any, Dict, List, Deque, Hashable, Callable, Awaitable, Optional
+
+from .exception import NetworkError
+
+SEND_APIS = ('sendGroupMessage', 'sendFriendMessage', 'sendTempMessage')
+
+_Send = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class TokenBucket:
+    """
+    :说明:
+
+      令牌桶, 每秒补充 ``rate`` 个令牌, 最多积攒 ``capacity`` 个
+
+    :参数:
+
+      * ``rate: float``: 每秒补充的令牌数
+      * ``capacity: float``: 令牌桶容量, 即允许的突发数量
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def idle(self) -> bool:
+        """令牌桶是否已经补满"""
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self) -> None:
+        """取走一个令牌, 令牌不足时等待补充"""
+        self._refill()
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+class _Pending:
+    __slots__ = ('api', 'data', 'send', 'future', 'enqueued')
+
+    def __init__(self, api: str, data: Dict[str, Any], send: _Send):
+        self.api = api
+        self.data = data
+        self.send = send
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+
+
+def _is_plain(chain: Any) -> bool:
+    return isinstance(chain, list) and bool(chain) and all(
+        isinstance(segment, dict) and segment.get('type') == 'Plain'
+        for segment in chain
+    )
+
+
+def _mergeable(first: _Pending, other: _Pending) -> bool:
+    if first.api != other.api or first.data.get('quote') or other.data.get('quote'):
+        return False
+    if not (_is_plain(first.data.get('messageChain'))
+            and _is_plain(other.data.get('messageChain'))):
+        return False
+    return all(
+        first.data.get(key) == other.data.get(key)
+        for key in first.data.keys() | other.data.keys() if key != 'messageChain'
+    )
+
+
+def _merge(batch: List[_Pending]) -> Dict[str, Any]:
+    chain: List[Dict[str, Any]] = []
+    for pending in batch:
+        if chain:
+            chain.append({'type': 'Plain', 'text': '\n'})
+        chain.extend(pending.data['messageChain'])
+    return {**batch[0].data, 'messageChain': chain}
+
+
+def send_target(api: str, data: Dict[str, Any]) -> Hashable:
+    """获取发送消息 api 的目标, 用于区分不同目标的令牌桶"""
+    if api == 'sendGroupMessage':
+        return ('group', data.get('target') or data.get('group'))
+    if api == 'sendFriendMessage':
+        return ('friend', data.get('target') or data.get('qq'))
+    return ('temp', data.get('group'), data.get('qq'))
+
+
+class SendScheduler:
+    """
+    :说明:
+
+      单个 Bot 的消息发送调度器
+
+      发送消息的请求按目标排队, 每个目标依次经过目标令牌桶与 Bot 全局令牌桶后发出;
+      开启合并时, 同一目标排队中相邻的纯文本消息会以换行连接后合并为一条消息发送
+
+      适配器为每个 Bot 保留同一个实例, 断线重连不会重置令牌桶
+
+    :参数:
+
+      * ``rate: Optional[float]``: Bot 每秒最多发送的消息数, 为 ``None`` 时不限制
+      * ``burst: int``: Bot 允许的突发消息数
+      * ``target_rate: Optional[float]``: 每个群/好友每秒最多发送的消息数, 为 ``None`` 时不限制
+      * ``target_burst: int``: 每个群/好友允许的突发消息数
+      * ``coalesce: bool``: 是否合并同一目标相邻的纯文本消息
+    """
+
+    def __init__(self,
+                 rate: Optional[float] = None,
+                 burst: int = 5,
+                 target_rate: Optional[float] = None,
+                 target_burst: int = 3,
+                 coalesce: bool = False):
+        self.target_rate = target_rate
+        self.target_burst = target_burst
+        self.coalesce = coalesce
+        self.sent = 0
+        self.coalesced = 0
+        self.latency_count = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._bucket = TokenBucket(rate, burst) if rate else None
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._queues: Dict[Hashable, Deque[_Pending]] = {}
+        self._drainers: Dict[Hashable, "asyncio.Task"] = {}
+
+    @property
+    def queued(self) -> int:
+        """排队中的消息数量"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """导出发送统计, 延迟单位为秒"""
+        return {
+            'queued': self.queued,
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'latency_avg': self.latency_total / self.latency_count if self.latency_count else 0.0,
+            'latency_max': self.latency_max,
+        }
+
+    def _target_bucket(self, target: Hashable) -> Optional[TokenBucket]:
+        if not self.target_rate:
+            return None
+        bucket = self._buckets.get(target)
+        if bucket is None:
+            if len(self._buckets) >= 1024:
+                self._buckets = {
+                    key: value for key, value in self._buckets.items() if not value.idle
+                }
+            bucket = self._buckets[target] = TokenBucket(self.target_rate, self.target_burst)
+        return bucket
+
+    async def submit(self, api: str, data: Dict[str, Any], send: _Send) -> Any:
+        """
+        :说明:
+
+          将发送消息的请求加入对应目标的队列, 等待实际发出后返回结果
+
+        :参数:
+
+          * ``api: str``: api 名称
+          * ``data: Dict[str, Any]``: api 参数
+          * ``send: Callable[[str, Dict[str, Any]], Awaitable[Any]]``: 实际发出请求的函数
+        """
+        target = send_target(api, data)
+        pending = _Pending(api, data, send)
+        self._queues.setdefault(target, deque()).append(pending)
+        if target not in self._drainers:
+            # 发送队列由多个调用方共用, 不继承发起者的上下文 (如 webhook 快速回复)
+            self._drainers[target] = contextvars.Context().run(
+                asyncio.create_task, self._drain(target))
+        return await pending.future
+
+    async def _drain(self, target: Hashable) -> None:
+        queue = self._queues[target]
+        bucket = self._target_bucket(target)
+        try:
+            while queue:
+                if bucket is not None:
+                    await bucket.acquire()
+                if self._bucket is not None:
+                    await self._bucket.acquire()
+                if not queue:
+                    break
+                batch = [queue.popleft()]
+                while self.coalesce and queue and _mergeable(batch[0], queue[0]):
+                    batch.append(queue.popleft())
+                await self._send(batch)
+        finally:
+            self._drainers.pop(target, None)
+            if not queue:
+                self._queues.pop(target, None)
+
+    async def _send(self, batch: List[_Pending]) -> None:
+        now = time.monotonic()
+        for pending in batch:
+            latency = now - pending.enqueued
+            self.latency_count += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+        self.sent += 1
+        self.coalesced += len(batch) - 1
+        data = batch[0].data if len(batch) == 1 else _merge(batch)
+        try:
+            result = await batch[0].send(batch[0].api, data)
+        except Exception as e:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+        else:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_result(result)
+
+    def close(self) -> None:
+        """取消全部排队中的消息, 在关闭时调用; 已经发出的请求由连接自行结束"""
+        for queue in self._queues.values():
+            while queue:
+                pending = queue.popleft()
+                if not pending.future.done():
+                    pending.future.set_exception(NetworkError('connection closed'))
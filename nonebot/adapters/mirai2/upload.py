@@ -0,0 +1,175 @@
+import os
+import tempfile
+import contextlib
+from io import BytesIO
+from base64 import b64decode
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    IO,
+    Any,
+    Dict,
+    List,
+    Tuple,
+    Union,
+    Optional,
+    AsyncIterable,
+    AsyncIterator
+)
+
+from .media import hash_file
+
+if TYPE_CHECKING:
+    from .bot import Bot
+
+FileInput = Union[str, Path, bytes, IO[bytes], AsyncIterable[bytes]]
+"""可上传的文件: 本地路径, bytes, 二进制文件对象或异步产生 bytes 的迭代器"""
+
+UPLOAD_TYPES = {
+    'sendGroupMessage': 'group',
+    'sendFriendMessage': 'friend',
+    'sendTempMessage': 'temp',
+}
+"""发送消息的 api 对应的上传类型"""
+
+_UPLOAD_SEGMENTS = {
+    'Image': ('uploadImage', 'img', 'imageId'),
+    'FlashImage': ('uploadImage', 'img', 'imageId'),
+    'Voice': ('uploadVoice', 'voice', 'voiceId'),
+}
+
+
+@contextlib.asynccontextmanager
+async def open_upload(file: FileInput,
+                      name: Optional[str] = None) -> AsyncIterator[Tuple[str, IO[bytes]]]:
+    """
+    :说明:
+
+      以文件对象的形式打开待上传的文件, 上传时由 http 客户端分块读取
+
+      异步迭代器会先写入临时文件, 不会在内存中拼接完整内容
+
+    :参数:
+
+      * ``file: FileInput``: 待上传的文件
+      * ``name: Optional[str]``: 上传时使用的文件名
+    """
+    if isinstance(file, (str, Path)):
+        path = Path(file)
+        with path.open('rb') as f:
+            yield name or path.name, f
+    elif isinstance(file, (bytes, bytearray, memoryview)):
+        yield name or 'file', BytesIO(file)
+    elif hasattr(file, 'read'):
+        filename = getattr(file, 'name', None)
+        yield name or (Path(filename).name if isinstance(filename, str) else 'file'), file  # type: ignore
+    elif hasattr(file, '__aiter__'):
+        with tempfile.TemporaryFile() as f:
+            async for chunk in file:  # type: ignore
+                f.write(chunk)
+            f.seek(0)
+            yield name or 'file', f
+    else:
+        raise TypeError(f'Unsupported upload file type {type(file).__name__}')
+
+
+async def upload_image(bot: "Bot", file: FileInput, type: str = 'group') -> Dict[str, Any]:
+    """
+    :说明:
+
+      通过 mirai-api-http 的 http 接口上传图片
+
+    :参数:
+
+      * ``file: FileInput``: 图片文件
+      * ``type: str``: ``group``, ``friend`` 或 ``temp``
+
+    :返回:
+
+      ``{"imageId": ..., "url": ...}``
+    """
+    return await bot.adapter._upload(bot, 'uploadImage', {'type': type}, 'img', file)
+
+
+async def upload_voice(bot: "Bot", file: FileInput, type: str = 'group') -> Dict[str, Any]:
+    """
+    :说明:
+
+      通过 mirai-api-http 的 http 接口上传语音, 目前仅支持 ``group`` 类型
+
+    :返回:
+
+      ``{"voiceId": ..., "url": ...}``
+    """
+    return await bot.adapter._upload(bot, 'uploadVoice', {'type': type}, 'voice', file)
+
+
+async def upload_file(bot: "Bot", target: int, file: FileInput,
+                      path: str = '', name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    :说明:
+
+      通过 mirai-api-http 的 http 接口上传群文件
+
+    :参数:
+
+      * ``target: int``: 群号
+      * ``file: FileInput``: 文件
+      * ``path: str``: 上传到的群文件目录 id, 为空时上传到根目录
+      * ``name: Optional[str]``: 群文件中的文件名, 不填写时使用本地文件名
+    """
+    return await bot.adapter._upload(
+        bot, 'file/upload', {'type': 'group', 'target': target, 'path': path},
+        'file', file, name
+    )
+
+
+def _local_source(segment: Dict[str, Any]) -> Optional[FileInput]:
+    """开启媒体缓存时, 将 ``base64`` 与 Bot 本地存在的 ``path`` 也作为上传来源"""
+    if segment.get('base64'):
+        return b64decode(segment['base64'])
+    path = segment.get('path')
+    if path and os.path.isfile(path):
+        return path
+    return None
+
+
+async def upload_segments(bot: "Bot", api: str, chain: List[Dict[str, Any]]) -> None:
+    """
+    :说明:
+
+      上传已导出消息链中带有 ``file`` 的图片与语音消息段, 并替换为上传得到的 id
+
+      开启媒体缓存时, ``base64`` 与 Bot 本地存在的 ``path`` 也会按内容哈希查找缓存,
+      未命中时上传, 之后相同内容的消息段直接使用缓存的 id
+
+    :参数:
+
+      * ``api: str``: 发送消息的 api, 决定图片的上传类型
+      * ``chain: List[Dict[str, Any]]``: ``MessageChain.export`` 导出的消息链
+    """
+    cache = bot.adapter.media_cache
+    for segment in chain:
+        if segment.get('type') not in _UPLOAD_SEGMENTS or segment.get(
+                _UPLOAD_SEGMENTS[segment['type']][2]):
+            continue
+        file = segment.get('file')
+        if file is None and cache is not None:
+            file = _local_source(segment)
+        if file is None:
+            continue
+        endpoint, field, id_key = _UPLOAD_SEGMENTS[segment['type']]
+        upload_type = 'group' if endpoint == 'uploadVoice' else UPLOAD_TYPES[api]
+        async with open_upload(file) as (name, f):
+            digest = await hash_file(f) if cache is not None else None
+            key = (digest, id_key, upload_type)
+            media_id = cache.get(key) if cache is not None and digest else None
+            if media_id is None:
+                result = await bot.adapter._upload(
+                    bot, endpoint, {'type': upload_type}, field, f, name)
+                media_id = result[id_key]
+                if cache is not None and digest:
+                    cache.set(key, media_id)
+        for source in ('file', 'base64', 'path', 'url'):
+            segment.pop(source, None)
+        segment[id_key] = media_id
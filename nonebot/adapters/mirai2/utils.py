@@ -1,21 +1,26 @@
 import asyncio
 import re
 import sys
-from typing import TYPE_CHECKING, Any, Dict, Optional, Union
+from collections import OrderedDict
+from typing import (
+    Any,
+    Dict,
+    Tuple,
+    Callable,
+    Union,
+    Iterable,
+    Awaitable,
+    Optional
+)
 
-from nonebot.message import handle_event
 from nonebot.typing import overrides
 from nonebot.utils import DataclassEncoder
 
-from .exception import ApiNotAvailable
+from .exception import ApiNotAvailable, NetworkError
 
-from .event import Event, GroupMessage, MessageEvent, MessageSource, MessageQuote
-from .message import MessageSegment, MessageType
+from .message import MessageSegment
 from . import log
 
-if TYPE_CHECKING:
-    from .bot import Bot
-
 
 def snake_to_camel(name: str):
             for i in ['anno', 'resp']:
@@ -25,91 +30,186 @@ def snake_to_camel(name: str):
             return ''.join([first.lower(), *(r.title() for r in rest)])
 
 
-def process_source(bot: "Bot", event: MessageEvent) -> MessageEvent:
-    source = event.message_chain.extract_first(MessageType.SOURCE)
-    if source is not None:
-        event.source = MessageSource.parse_obj(source.data)
-    return event
-
-
-def process_quote(bot: "Bot", event: Union[MessageEvent, GroupMessage]) -> MessageEvent:
-    quote = event.message_chain.extract_first(MessageType.QUOTE)
-    if quote is not None:
-        event.quote = MessageQuote.parse_obj(quote.data)
-        if quote.data['senderId'] == event.self_id:
-            event.to_me = True
-    return event
-
-
-def process_at(bot: "Bot", event: GroupMessage) -> GroupMessage:
-    c = 0
-    for msg in event.message_chain:
-        if (msg.type == MessageType.AT) and (msg.data.get('target', '') == event.self_id):
-            event.to_me = True
-            event.message_chain.pop(c)
-            break
-        c += 1
-    if not event.message_chain:
-        event.message_chain.append(MessageSegment.plain(""))
-    return event
-
-
-def process_nick(bot: "Bot", event: GroupMessage) -> GroupMessage:
-    plain = event.message_chain.extract_first(MessageType.PLAIN)
-    if plain is not None:
-        if len(bot.config.nickname):
-            text = str(plain)
-            nick_regex = '|'.join(filter(lambda x: x, bot.config.nickname))
-            matched = re.search(rf"^({nick_regex})([\s,，]*|$)", text, re.IGNORECASE)
-            if matched is not None:
-                event.to_me = True
-                nickname = matched.group(1)
-                log.info(f'User is calling me {nickname}')
-                plain.data['text'] = text[matched.end():]
-        event.message_chain.insert(0, plain)
-    return event
-
-
-async def process_event(bot: "Bot", event: Event) -> None:
-    if isinstance(event, MessageEvent):
-        event = process_source(bot, event)
-        event = process_quote(bot, event)
-        if isinstance(event, GroupMessage):
-            event = process_nick(bot, event)
-            event = process_at(bot, event)
-    await handle_event(bot, event)
+class NicknameMatcher:
+    """
+    :说明:
 
+      匹配消息开头的昵称, 昵称按正则表达式处理, 忽略大小写
 
-class SyncIDStore:
-    _sync_id = 0
-    _futures: Dict[str, asyncio.Future] = {}
+    :参数:
+
+      * ``nicknames: Iterable[str]``: 昵称列表
+    """
+
+    def __init__(self, nicknames: Iterable[str]):
+        nick_regex = '|'.join(filter(lambda x: x, nicknames))
+        self._regex = re.compile(rf"^({nick_regex})([\s,，]*|$)", re.IGNORECASE) \
+            if nick_regex else None
+
+    def match(self, text: str) -> Optional[Tuple[str, int]]:
+        """返回匹配到的昵称与昵称后正文的起始位置"""
+        if self._regex is None:
+            return None
+        matched = self._regex.match(text)
+        if matched is None:
+            return None
+        return matched.group(1), matched.end()
+
+
+class TrieNicknameMatcher:
+    """
+    :说明:
+
+      使用前缀树匹配消息开头最长的昵称, 昵称按普通文本处理, 忽略大小写; 接口与 ``NicknameMatcher`` 相同
+
+      匹配耗时只与消息开头的长度有关, 适用于昵称与别名较多的情况
+
+    :参数:
 
-    @classmethod
-    def get_id(cls) -> str:
-        sync_id = cls._sync_id
-        cls._sync_id = (cls._sync_id + 1) % sys.maxsize
+      * ``nicknames: Iterable[str]``: 昵称列表
+    """
+    _separator = re.compile(r"[\s,，]*")
+
+    def __init__(self, nicknames: Iterable[str]):
+        self._root: Dict[str, Any] = {}
+        for nickname in filter(lambda x: x, nicknames):
+            node = self._root
+            for char in nickname:
+                node = node.setdefault(char.lower(), {})
+            node[''] = True
+
+    def match(self, text: str) -> Optional[Tuple[str, int]]:
+        """返回匹配到的昵称与昵称后正文的起始位置"""
+        node = self._root
+        end = 0
+        for index, char in enumerate(text):
+            node = node.get(char.lower())
+            if node is None:
+                break
+            if '' in node:
+                end = index + 1
+        if not end:
+            return None
+        return text[:end], self._separator.match(text, end).end()
+
+
+def get_nickname_matcher(nicknames: Iterable[str],
+                         kind: str = 'regex') -> Union[NicknameMatcher, TrieNicknameMatcher]:
+    """
+    :说明:
+
+      构建昵称匹配器; 适配器在初始化时根据配置构建一次, 之后处理每条群消息时复用
+
+    :参数:
+
+      * ``nicknames: Iterable[str]``: 昵称列表
+      * ``kind: str``: 匹配器类型, ``regex`` 或 ``trie``
+    """
+    if kind == 'trie':
+        return TrieNicknameMatcher(nicknames)
+    return NicknameMatcher(nicknames)
+
+
+class SyncIDStore:
+    """
+    :说明:
+
+      单个连接的 syncId 请求/响应关联表
+
+      每个连接持有独立的 syncId 计数器与等待中的请求表, 等待中的请求数量达到 ``max_pending``
+      时新的请求会等待空位; 连接断开时调用 ``close`` 立即结束全部等待中的请求
+
+    :参数:
+
+      * ``max_pending: int``: 同时等待响应的请求数量上限
+      * ``late_window: int``: 记录已超时的 syncId 数量, 用于识别超时后才到达的响应
+    """
+
+    def __init__(self, max_pending: int = 1024, late_window: int = 1024):
+        self.max_pending = max_pending
+        self.late_window = late_window
+        self.closed = False
+        self.late_responses = 0
+        self.unknown_responses = 0
+        self.timeouts = 0
+        self._sync_id = 0
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._expired: "OrderedDict[str, None]" = OrderedDict()
+        self._semaphore = asyncio.Semaphore(max_pending)
+
+    @property
+    def in_flight(self) -> int:
+        """等待响应中的请求数量"""
+        return len(self._futures)
+
+    def stats(self) -> Dict[str, int]:
+        """导出当前连接的请求统计"""
+        return {
+            'in_flight': self.in_flight,
+            'max_pending': self.max_pending,
+            'timeouts': self.timeouts,
+            'late_responses': self.late_responses,
+            'unknown_responses': self.unknown_responses,
+        }
+
+    def get_id(self) -> str:
+        sync_id = self._sync_id
+        self._sync_id = (self._sync_id + 1) % sys.maxsize
         return str(sync_id)
 
-    @classmethod
-    def add_response(cls, response: Dict[str, Any]):
+    def add_response(self, response: Dict[str, Any]) -> Optional[str]:
         if not isinstance(response.get('syncId'), str):
-            return
+            return None
         sync_id: str = response['syncId']
-        if sync_id in cls._futures:
-            cls._futures[sync_id].set_result(response)
+        future = self._futures.get(sync_id)
+        if future is not None:
+            if not future.done():
+                future.set_result(response)
+        elif sync_id in self._expired:
+            del self._expired[sync_id]
+            self.late_responses += 1
+            log.debug(f'Response of syncId {sync_id} arrived after timeout')
+        else:
+            self.unknown_responses += 1
         return sync_id
 
-    @classmethod
-    async def fetch_response(cls, sync_id: str,
-                             timeout: Optional[float]) -> Dict[str, Any]:
-        future = asyncio.get_running_loop().create_future()
-        cls._futures[sync_id] = future
-        try:
-            return await asyncio.wait_for(future, timeout)
-        except asyncio.TimeoutError:
-            raise ApiNotAvailable('timeout') from None
-        finally:
-            del cls._futures[sync_id]
+    async def request(self, send: Callable[[str], Awaitable[Any]],
+                      timeout: Optional[float]) -> Dict[str, Any]:
+        """
+        :说明:
+
+          分配 syncId 并调用 ``send`` 发出请求, 等待对应的响应
+
+        :参数:
+
+          * ``send: Callable[[str], Awaitable[Any]]``: 以 syncId 为参数发出请求的函数
+          * ``timeout: Optional[float]``: 等待响应的超时时间
+        """
+        async with self._semaphore:
+            if self.closed:
+                raise NetworkError('connection closed')
+            sync_id = self.get_id()
+            future = asyncio.get_running_loop().create_future()
+            self._futures[sync_id] = future
+            try:
+                await send(sync_id)
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._expired[sync_id] = None
+                if len(self._expired) > self.late_window:
+                    self._expired.popitem(last=False)
+                raise ApiNotAvailable('timeout') from None
+            finally:
+                self._futures.pop(sync_id, None)
+
+    def close(self) -> None:
+        """结束全部等待中的请求, 之后的请求将直接失败"""
+        self.closed = True
+        futures, self._futures = self._futures, {}
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(NetworkError('connection closed'))
 
 
 class MiraiDataclassEncoder(DataclassEncoder):
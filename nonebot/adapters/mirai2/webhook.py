@@ -0,0 +1,65 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+QUICK_REPLY_APIS = {'sendFriendMessage', 'sendGroupMessage', 'sendTempMessage', 'sendNudge'}
+"""可以通过 webhook 响应执行的 api"""
+
+
+class WebhookReply:
+    """
+    :说明:
+
+      单个 webhook 请求的快速回复
+
+      处理该请求推送的事件时, 第一次发送消息的 api 调用不再单独发送,
+      而是作为该请求的 http 响应交给 mirai-api-http 执行, 调用方得到的 ``messageId`` 为 ``-1``;
+      响应返回后再调用的 api 按正常方式发送
+
+    :参数:
+
+      * ``qq: str``: 推送事件的 Bot 账号
+    """
+    __slots__ = ('qq', 'command', 'closed', '_claimed')
+
+    def __init__(self, qq: str):
+        self.qq = qq
+        self.command: Optional[Dict[str, Any]] = None
+        self.closed = False
+        self._claimed = asyncio.Event()
+
+    def claim(self, qq: str, api: str, subcommand: Optional[str], data: Dict[str, Any]) -> bool:
+        """尝试将 api 调用作为快速回复, 成功时返回 ``True``"""
+        if self.closed or self.command is not None or qq != self.qq or api not in QUICK_REPLY_APIS:
+            return False
+        self.command = {'command': api, 'content': data}
+        if subcommand:
+            self.command['subCommand'] = subcommand
+        self._claimed.set()
+        return True
+
+    async def wait(self, tasks: List["asyncio.Task"], timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        :说明:
+
+          等待快速回复, 直至产生回复, 事件全部处理完成或超时; 返回后不再接受快速回复
+
+        :参数:
+
+          * ``tasks: List[asyncio.Task]``: 处理该请求推送事件的任务
+          * ``timeout: float``: 等待时间上限, 单位为秒
+        """
+        if tasks and self.command is None:
+            waiters = [
+                asyncio.ensure_future(self._claimed.wait()),
+                asyncio.ensure_future(asyncio.wait(tasks)),
+            ]
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in waiters:
+                waiter.cancel()
+        self.closed = True
+        return self.command
+
+
+webhook_reply: ContextVar[Optional[WebhookReply]] = ContextVar('mirai2_webhook_reply', default=None)
+"""当前处理的 webhook 请求, 由处理事件的任务继承"""